@@ -0,0 +1,48 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+'''
+writing a file so readers only ever see the old or the new version: everything goes to a temp
+file in the same directory, which is swapped in with os.replace once it is complete.
+every write gets its own temp file (mkstemp), so two writers of the same file (a gui add next to
+a cli sync) never write into each other's temp file or remove it; the last one to finish wins.
+'''
+
+# The process umask, so temp files end up with the permissions a plain open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def open_temp(directory: str, mode: str = "w", prefix: str = "", **kwargs) -> tuple:
+    """(open file, path) of a new temp file in `directory`; kwargs go to open (encoding, buffering)."""
+    fd, tmp_file = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+    try:
+        os.chmod(tmp_file, 0o666 & ~_UMASK)
+        return os.fdopen(fd, mode, **kwargs), tmp_file
+    except BaseException:
+        os.close(fd)
+        os.remove(tmp_file)
+        raise
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", **kwargs):
+    """
+    Opens a temp file next to `path` and swaps it in as `path` when the block finishes.
+    If the block raises, the temp file is removed and `path` is left as it was.
+    """
+    f, tmp_file = open_temp(os.path.dirname(os.path.abspath(path)), mode, os.path.basename(path) + ".", **kwargs)
+    try:
+        with f:
+            yield f
+        try:
+            # Keep the permissions of the file being replaced
+            os.chmod(tmp_file, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_file, path)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
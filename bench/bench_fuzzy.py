@@ -0,0 +1,82 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy_search import edit_distance
+from search_index import SearchIndex
+from synthetic import random_names
+
+'''
+fuzzy artist search (SearchIndex.fuzzy) with tens of thousands of distinct names: the time to
+build the deletion index on first use, then per-query latency for misspelled names, next to
+measuring the query against every distinct name.
+usage: python bench/bench_fuzzy.py [distinct names] [queries]
+'''
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """One typo in a random word: a dropped, doubled or swapped letter."""
+    words = name.split()
+    idx = rng.randrange(len(words))
+    word = words[idx]
+    pos = rng.randrange(1, len(word))
+    kind = rng.choice(("drop", "double", "swap"))
+    if kind == "drop":
+        word = word[:pos] + word[pos + 1:]
+    elif kind == "double":
+        word = word[:pos] + word[pos] + word[pos:]
+    else:
+        word = word[:pos - 1] + word[pos] + word[pos - 1] + word[pos + 1:]
+    words[idx] = word
+    return " ".join(words)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    names = random_names(count, seed=1)
+
+    # Every name in a scene of its own, 50 scenes to an episode
+    data = []
+    for start in range(0, len(names), 50):
+        scenes = [{"scene_number": number, "scene_heading": "", "setting": "INT.", "location": "Set", "TOD": "DAY",
+                   "artists": [{"artist": name, "costume": "", "props": ""}]}
+                  for number, name in enumerate(names[start:start + 50], 1)]
+        data.append({"episode": f"ep{start // 50}", "scenes": scenes})
+    index = SearchIndex.build(data)
+
+    start = time.perf_counter()
+    index.fuzzy("artist", "warm up")
+    build_time = time.perf_counter() - start
+
+    samples = [misspell(name, rng).lower() for name in rng.sample(names, queries)]
+    latencies = []
+    found = 0
+    for query in samples:
+        start = time.perf_counter()
+        ranked = index.fuzzy("artist", query)
+        latencies.append(time.perf_counter() - start)
+        found += bool(ranked)
+
+    start = time.perf_counter()
+    values = list(index.fields["artist"].postings)
+    for query in samples[:10]:
+        sorted((edit_distance(query, value), value) for value in values)
+    scan_time = (time.perf_counter() - start) / 10
+
+    latencies.sort()
+    # A swap in a word of up to 5 letters is 2 edits, over the default limit of 1 there
+    print(f"{len(values)} distinct names, {queries} misspelled queries ({found} with a match)")
+    print(f"deletion index built in {build_time:.3f} s on first use")
+    print(f"fuzzy query: median {statistics.median(latencies) * 1000:6.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms, max {latencies[-1] * 1000:6.2f} ms")
+    print(f"edit distance to every name: {scan_time * 1000:6.1f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
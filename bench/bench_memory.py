@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_file
+from search_results import find_matches
+from storage import DataCache, save_data
+from synthetic import write_corpus
+
+'''
+memory held by a loaded database: plain dicts vs the compact model (compact_model.py).
+each variant is loaded in a fresh interpreter, which reports the memory the loaded data
+keeps (tracemalloc), its peak resident size, the load time and a full-scan search time.
+usage: python bench/bench_memory.py [episodes]
+'''
+
+QUERIES = [("artist", "ra"), ("artist", "zzq"), ("location", "ka")]
+
+
+def child(json_file: str, compact: bool) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    cache = DataCache(json_file, compact=compact)
+    data = cache.data()
+    load_time = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for search_type, search_value in QUERIES:
+        find_matches(data, search_type, search_value)
+    scan_time = (time.perf_counter() - start) / len(QUERIES)
+
+    result = {"retained_mb": retained / 1e6, "load_s": load_time, "scan_ms": scan_time * 1000}
+    try:
+        import resource
+        # kilobytes on linux
+        result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+    except ImportError:
+        pass
+    return result
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(child(sys.argv[2], sys.argv[3] == "compact")))
+        return
+
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_corpus(os.path.join(workdir, "corpus"), episodes, dialogue_lines=0)
+        json_file = os.path.join(workdir, "data.json")
+        save_data(json_file, [parse_fountain_file(path) for path in paths])
+        print(f"{episodes} episodes, data.json {os.path.getsize(json_file) / 1e6:.1f} MB")
+
+        results = {}
+        for mode in ("dict", "compact"):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json_file, mode],
+                                    capture_output=True, text=True, check=True).stdout
+            results[mode] = json.loads(output)
+            row = results[mode]
+            print(f"{mode:8} retained {row['retained_mb']:8.1f} MB, peak rss {row.get('peak_rss_mb', 0):8.1f} MB, "
+                  f"load {row['load_s']:6.2f} s (traced), full scan {row['scan_ms']:7.1f} ms")
+
+        saved = 1 - results["compact"]["retained_mb"] / results["dict"]["retained_mb"]
+        print(f"compact model keeps {saved:.0%} less memory")
+
+
+if __name__ == "__main__":
+    main()
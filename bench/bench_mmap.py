@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_file
+from synthetic import synthetic_episode
+
+'''
+mmap bulk parser vs the regular parser on a large synthetic "omnibus" file.
+usage: python bench/bench_mmap.py [size in MB]
+'''
+
+
+def write_omnibus(path: str, size_mb: int) -> None:
+    target = size_mb * 1024 * 1024
+    written = 0
+    seed = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            chunk = synthetic_episode(scenes=200, seed=seed)
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+            seed += 1
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "omnibus.fountain")
+        write_omnibus(path, size_mb)
+        actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+        regular, regular_time = timed(lambda: parse_fountain_file(path))
+        mapped, mapped_time = timed(lambda: parse_fountain_file(path, use_mmap=True))
+        if regular != mapped:
+            sys.exit("mmap parser output differs from parse_fountain_file!")
+
+    print(f"input  : {actual_mb:.1f} MB, {len(regular['scenes'])} scenes")
+    print(f"regular: {regular_time:6.2f} s  {actual_mb / regular_time:7.1f} MB/s")
+    print(f"mmap   : {mapped_time:6.2f} s  {actual_mb / mapped_time:7.1f} MB/s")
+    print(f"speedup: {regular_time / mapped_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
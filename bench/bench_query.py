@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_text
+from query import describe_plan, find_query_matches, parse_query
+from search_index import SearchIndex
+from storage import query_matches
+from synthetic import random_names, synthetic_episode
+
+'''
+compound queries (query.py): the index plan (query_matches) vs testing every scene against the
+conditions, for a few query shapes from very selective to hardly selective at all. every
+query's results are checked against the full scan.
+usage: python bench/bench_query.py [episodes] [distinct artists]
+'''
+
+# Query templates, filled in from a random scene so they always have at least one hit
+SHAPES = {
+    "artist + location + tod": "artist:{artist} location:{location} tod:{tod}",
+    "artist + props": "artist:{artist} props:{props}",
+    "location + setting + tod": "location:{location} setting:{setting} tod:{tod}",
+    "costume + props + tod": "costume:{costume} props:{props} tod:{tod}",
+    "episode + tod": "episode:{episode} tod:{tod}",
+}
+
+
+def fill(shape: str, data: list, rng) -> str:
+    entry = rng.choice(data)
+    scene = rng.choice(entry["scenes"])
+    artist = rng.choice(scene["artists"])
+    return shape.format(artist=artist["artist"], location=scene["location"], tod=scene["TOD"],
+                        setting=scene["setting"], costume=artist["costume"], props=artist["props"] or "phone",
+                        episode=entry["episode"])
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = random.Random(0)
+    cast = random_names(distinct, seed=1)
+    locations = random_names(distinct // 10, seed=2, words=1)
+
+    data = [parse_fountain_text(synthetic_episode(scenes=20, dialogue_lines=0, seed=number,
+                                                  cast=cast, locations=locations), f"ep{number}")
+            for number in range(episodes)]
+    start = time.perf_counter()
+    index = SearchIndex.build(data)
+    print(f"{episodes} episodes, {sum(len(entry['scenes']) for entry in data)} scenes, "
+          f"index built in {time.perf_counter() - start:.2f} s")
+
+    for label, shape in SHAPES.items():
+        queries = [parse_query(fill(shape, data, rng)) for _ in range(20)]
+        scan_time = plan_time = 0.0
+        for conditions in queries:
+            start = time.perf_counter()
+            expected = find_query_matches(data, conditions)
+            scan_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual, steps = query_matches(data, index, conditions)
+            plan_time += time.perf_counter() - start
+
+            if actual != expected:
+                sys.exit(f"planned results differ from a full scan for {conditions}")
+        print(f"{label:26} full scan {scan_time / len(queries) * 1000:7.2f} ms/query, "
+              f"planned {plan_time / len(queries) * 1000:7.2f} ms/query")
+
+    print("\n".join(describe_plan(query_matches(data, index, queries[0])[1])))
+
+
+if __name__ == "__main__":
+    main()
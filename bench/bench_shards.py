@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting import export_markdown
+from fountain_parser import parse_fountain_file
+from storage import _existing, add_episode, list_episodes, load_data, save_data
+from synthetic import write_corpus
+
+'''
+data.json vs the sharded store (data.shards, shard_store.py): the duplicate check, adding one
+episode, listing the episodes and a full markdown export, each timed on both layouts.
+usage: python bench/bench_shards.py [episodes]
+'''
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_corpus(os.path.join(workdir, "corpus"), episodes + 1, dialogue_lines=0)
+        # The last file is held back to be added
+        data = [parse_fountain_file(path) for path in paths[:-1]]
+        print(f"{episodes} episodes")
+
+        for name in ("data.json", "data.shards"):
+            json_file = os.path.join(workdir, name)
+            save_data(json_file, data)
+            output_file = os.path.join(workdir, "formatted.md")
+            row = {
+                "duplicate check": timed(lambda: _existing(json_file)),
+                "add one episode": timed(lambda: add_episode(paths[-1], json_file)),
+                "list episodes": timed(lambda: list_episodes(json_file)),
+                "markdown export": timed(lambda: export_markdown(load_data(json_file), output_file)),
+            }
+            print(f"{name:12} " + ", ".join(f"{label} {seconds:7.3f} s" for label, seconds in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_file
+from search_index import data_signature
+from snapshot import read_snapshot, write_snapshot
+from storage import save_data, snapshot_path
+from synthetic import write_corpus
+
+'''
+cold load of data.json vs its binary snapshot (snapshot.py): file size, the time to write
+the snapshot once, and load times for plain dicts and the compact model.
+usage: python bench/bench_snapshot.py [episodes]
+'''
+
+
+def best_of(func, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_corpus(os.path.join(workdir, "corpus"), episodes, dialogue_lines=0)
+        json_file = os.path.join(workdir, "data.json")
+        save_data(json_file, [parse_fountain_file(path) for path in paths])
+        snapshot_file = snapshot_path(json_file)
+        signature = data_signature(json_file)
+
+        def load_json():
+            with open(json_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        data, json_time = best_of(load_json)
+        _, write_time = best_of(lambda: write_snapshot(snapshot_file, data, signature), repeat=1)
+        plain, plain_time = best_of(lambda: read_snapshot(snapshot_file, signature))
+        _, compact_time = best_of(lambda: read_snapshot(snapshot_file, signature, compact=True))
+        if plain != data:
+            sys.exit("snapshot does not give back the same data")
+
+        json_size, snapshot_size = os.path.getsize(json_file), os.path.getsize(snapshot_file)
+        print(f"{episodes} episodes")
+        print(f"data.json           {json_size / 1e6:8.1f} MB   json.load       {json_time:6.3f} s")
+        print(f"data.snapshot.pickle{snapshot_size / 1e6:8.1f} MB   snapshot dicts  {plain_time:6.3f} s "
+              f"({json_time / plain_time:.1f}x), compact {compact_time:6.3f} s ({json_time / compact_time:.1f}x)")
+        print(f"snapshot written once in {write_time:.3f} s, {snapshot_size / json_size:.0%} of the json size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_text
+from sqlite_store import search_sqlite, write_sqlite
+from storage import save_data, search_data
+from synthetic import synthetic_episode
+
+'''
+indexed sqlite lookups vs loading the whole json file, on a synthetic database.
+a guest artist shows up in every 500th episode, so there's a selective query to time
+next to the common names every scene is full of.
+usage: python bench/bench_sqlite.py [episodes]
+'''
+
+QUERIES = [("artist", "guest star"), ("artist", "est st"), ("location", "warehouse"), ("artist", "lamia")]
+
+
+def build_data(episodes: int) -> list:
+    data = []
+    for number in range(episodes):
+        episode = parse_fountain_text(synthetic_episode(scenes=20, dialogue_lines=0, seed=number), f"ep{number}")
+        if number % 500 == 0:
+            episode["scenes"][0]["artists"].append({"artist": "Guest Star", "costume": "gown", "props": ""})
+        data.append(episode)
+    return data
+
+
+def timed(func, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    data = build_data(episodes)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, "data.json")
+        db_file = os.path.join(tmp, "data.db")
+        save_data(json_file, data)
+        start = time.perf_counter()
+        write_sqlite(db_file, data)
+        print(f"{episodes} episodes, sqlite build {time.perf_counter() - start:.1f} s, "
+              f"json {os.path.getsize(json_file) / 2**20:.0f} MB, db {os.path.getsize(db_file) / 2**20:.0f} MB")
+
+        for search_type, value in QUERIES:
+            _, json_time = timed(lambda: search_data(json_file, search_type, value), repeat=1)
+            matches, db_time = timed(lambda: search_sqlite(db_file, search_type, value))
+            scenes = sum(len(entry["scenes"]) for entry in matches)
+            print(f"{search_type:8} {value!r:14} {scenes:7} scenes  json load {json_time * 1000:8.1f} ms"
+                  f"  sqlite {db_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_file
+from formatting import export_markdown, format_chunks
+from search_results import find_matches, render_markdown, render_text
+from storage import DataCache, add_episode, lookup_matches, save_data, search_data
+from synthetic import random_names, write_corpus
+
+'''
+end-to-end benchmark suite over synthetic seasons of 10 / 100 / 1,000 / 10,000 episodes:
+parse throughput, ingest latency for one more episode, cold and warm lookup p50/p99 and
+the time to format the whole database / a large result set as markdown.
+the cold lookup is the cli's own path (storage.lookup_matches, which streams a data.json).
+everything goes to a JSON report (bench/bench_results.json by default) so runs can be compared.
+usage: python bench/bench_suite.py [--sizes 10,100,1000,10000] [--backend json|jsonl|db|shards] [--output FILE]
+'''
+
+DEFAULT_SIZES = "10,100,1000,10000"
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results.json")
+WARM_QUERIES = 200
+COLD_QUERIES = 3
+ADDS = 3
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[round(pct / 100 * (len(ordered) - 1))]
+
+
+def millis(samples: list) -> dict:
+    return {"p50_ms": percentile(samples, 50) * 1000, "p99_ms": percentile(samples, 99) * 1000,
+            "mean_ms": sum(samples) / len(samples) * 1000}
+
+
+def make_queries(count: int, seed: int) -> list:
+    """Substrings of the corpus's artist names and locations (same seeds as write_corpus)."""
+    rng = random.Random(seed)
+    cast, locations = random_names(300, seed=1), random_names(80, seed=2, words=1)
+    queries = []
+    for idx in range(count):
+        search_type, names = ("artist", cast) if idx % 2 == 0 else ("location", locations)
+        name = rng.choice(names)
+        start = rng.randint(0, max(0, len(name) - 4))
+        queries.append((search_type, name[start:start + rng.randint(3, 6)]))
+    return queries
+
+
+def run_lookup(search_data_func, search_type: str, search_value: str) -> list:
+    """A whole lookup from memory: narrowing, the match loop and the text rendering the cli prints."""
+    matches = find_matches(search_data_func(search_type, search_value), search_type, search_value)
+    render_text(matches, search_type, search_value, episode_prefix="ep")
+    return matches
+
+
+def run_cold_lookup(db_file: str, search_type: str, search_value: str) -> list:
+    """A one-off `main.py lookup --no-daemon`: read (or stream) the database, match and render."""
+    matches = list(lookup_matches(db_file, search_type, search_value))
+    render_text(matches, search_type, search_value, episode_prefix="ep")
+    return matches
+
+
+def bench_size(episodes: int, backend: str, workdir: str, args) -> dict:
+    corpus_dir = os.path.join(workdir, f"corpus{episodes}")
+    paths = write_corpus(corpus_dir, episodes + ADDS, scenes=args.scenes, artists_per_scene=args.artists,
+                         synopsis_ratio=args.synopsis)
+    paths, extra = paths[:episodes], paths[episodes:]
+    result = {"episodes": episodes}
+
+    # Parse throughput
+    size = sum(os.path.getsize(path) for path in paths)
+    start = time.perf_counter()
+    data = [parse_fountain_file(path) for path in paths]
+    elapsed = time.perf_counter() - start
+    scenes = sum(len(entry["scenes"]) for entry in data)
+    result["parse"] = {"bytes": size, "scenes": scenes, "seconds": elapsed,
+                       "mb_per_s": size / elapsed / 1e6, "episodes_per_s": episodes / elapsed}
+
+    # Ingest latency: one more episode on top of the database
+    db_file = os.path.join(workdir, f"data{episodes}.{backend}")
+    save_data(db_file, data)
+    search_data(db_file, "artist", "zzz")  # builds the search index, as the first lookup would
+    samples = []
+    for path in extra:
+        start = time.perf_counter()
+        add_episode(path, db_file)
+        samples.append(time.perf_counter() - start)
+    result["ingest"] = millis(samples)
+
+    # Lookups: a fresh load per query (the cli) and a warm cache (gui, shell, serve)
+    queries = make_queries(WARM_QUERIES, seed=episodes)
+    samples = []
+    for search_type, search_value in queries[:COLD_QUERIES]:
+        start = time.perf_counter()
+        run_cold_lookup(db_file, search_type, search_value)
+        samples.append(time.perf_counter() - start)
+    result["lookup_cold"] = millis(samples)
+
+    cache = DataCache(db_file)
+    cache.search("artist", "zzz")
+    samples = []
+    for search_type, search_value in queries:
+        start = time.perf_counter()
+        run_lookup(cache.search, search_type, search_value)
+        samples.append(time.perf_counter() - start)
+    result["lookup_warm"] = millis(samples)
+
+    # Formatting: the whole database, and the markdown for a broad search
+    data = cache.data()
+    start = time.perf_counter()
+    for _ in format_chunks(data):
+        pass
+    result["format_all_s"] = time.perf_counter() - start
+
+    md_file = os.path.join(workdir, "formatted.md")
+    start = time.perf_counter()
+    export_markdown(data, md_file)
+    result["export_md_s"] = time.perf_counter() - start
+
+    matches = find_matches(cache.search("artist", "a"), "artist", "a")
+    start = time.perf_counter()
+    render_markdown(matches, "artist", "a")
+    result["results_md"] = {"matches": len(matches), "seconds": time.perf_counter() - start}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing, ingest, lookup and formatting.")
+    parser.add_argument('--sizes', type=str, default=DEFAULT_SIZES, help="Comma-separated episode counts.")
+    parser.add_argument('--backend', choices=["json", "jsonl", "db", "shards"], default="json")
+    parser.add_argument('--scenes', type=int, default=40, help="Average scenes per episode.")
+    parser.add_argument('--artists', type=int, default=4, help="Artists per scene.")
+    parser.add_argument('--synopsis', type=float, default=0.7, help="Share of scenes with a synopsis line.")
+    parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT, help="JSON report to write (default: bench/bench_results.json).")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "backend": args.backend,
+        "scenes": args.scenes, "artists": args.artists, "synopsis": args.synopsis,
+        "results": []
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for episodes in (int(size) for size in args.sizes.split(",")):
+            result = bench_size(episodes, args.backend, workdir, args)
+            report["results"].append(result)
+            print(f"{episodes:6} episodes: parse {result['parse']['mb_per_s']:6.1f} MB/s, "
+                  f"ingest {result['ingest']['p50_ms']:9.1f} ms, "
+                  f"lookup cold {result['lookup_cold']['p50_ms']:9.1f} ms, "
+                  f"warm p50/p99 {result['lookup_warm']['p50_ms']:7.2f}/{result['lookup_warm']['p99_ms']:7.2f} ms, "
+                  f"format {result['format_all_s']:6.2f} s")
+
+            # Written after every size so a long run still leaves a report
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=4)
+    print(f"Report written to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_text
+from legacy import legacy_parse_lines
+from synthetic import synthetic_bundle
+
+'''
+parse throughput of the single-pass tokenizer vs the old re.match loop, in MB/s.
+usage: python bench/bench_tokenizer.py [episodes]
+'''
+
+
+def best_of(func, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    text = synthetic_bundle(episodes)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    line_count = text.count("\n")
+
+    old = legacy_parse_lines(text.splitlines(), "bench")
+    new = parse_fountain_text(text, "bench")
+    if old != new:
+        sys.exit("tokenizer output differs from the legacy loop!")
+
+    old_time = best_of(lambda: legacy_parse_lines(text.splitlines(), "bench"))
+    new_time = best_of(lambda: parse_fountain_text(text, "bench"))
+
+    print(f"input    : {size_mb:.2f} MB, {line_count} lines, {len(new['scenes'])} scenes")
+    print(f"legacy   : {old_time * 1000:8.1f} ms  {size_mb / old_time:7.1f} MB/s")
+    print(f"tokenizer: {new_time * 1000:8.1f} ms  {size_mb / new_time:7.1f} MB/s")
+    print(f"speedup  : {old_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fountain_parser import parse_fountain_text
+from search_index import SearchIndex, narrow_data
+from synthetic import random_names, synthetic_episode
+
+'''
+trigram index vs a full scan for lookup's substring searches.
+the corpus uses tens of thousands of distinct artist names and thousands of locations,
+and every query's matching scenes are checked against the full scan.
+usage: python bench/bench_trigram.py [episodes] [distinct artists]
+'''
+
+
+def full_scan(data: list, search_type: str, search_value: str) -> list:
+    """(episode, scene number) pairs the lookup loops would report."""
+    search_value = search_value.lower()
+    hits = []
+    for entry in data:
+        for scene in entry["scenes"]:
+            if search_type == "artist":
+                matched = any(search_value in artist["artist"].lower() for artist in scene["artists"])
+            else:
+                matched = search_value in scene["location"].lower()
+            if matched:
+                hits.append((entry["episode"], scene["scene_number"]))
+    return hits
+
+
+def indexed(data: list, index, search_type: str, search_value: str) -> list:
+    return full_scan(narrow_data(data, index, search_type, search_value), search_type, search_value)
+
+
+def make_queries(names: list, rng) -> list:
+    queries = []
+    for name in rng.sample(names, 50):
+        start = rng.randint(0, max(0, len(name) - 4))
+        queries.append(name[start:start + rng.randint(3, 6)])
+    return queries + ["zzq", "a", "ka", "rim sar"]
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 30000
+    rng = random.Random(0)
+    cast = random_names(distinct, seed=1)
+    locations = random_names(distinct // 10, seed=2, words=1)
+
+    data = [parse_fountain_text(synthetic_episode(scenes=20, dialogue_lines=0, seed=number,
+                                                  cast=cast, locations=locations), f"ep{number}")
+            for number in range(episodes)]
+    start = time.perf_counter()
+    index = SearchIndex.build(data)
+    for field_index in index.fields.values():
+        field_index.matching_values("xyz")  # builds the trigram map
+    print(f"{episodes} episodes, {len(index.fields['artist'].postings)} distinct artists, "
+          f"{len(index.fields['location'].postings)} distinct locations, "
+          f"index built in {time.perf_counter() - start:.2f} s")
+
+    for search_type, names in (("artist", cast), ("location", locations)):
+        queries = make_queries(names, rng)
+        scan_time = index_time = 0.0
+        for query in queries:
+            start = time.perf_counter()
+            expected = full_scan(data, search_type, query)
+            scan_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = indexed(data, index, search_type, query)
+            index_time += time.perf_counter() - start
+
+            if actual != expected:
+                sys.exit(f"index results differ from a full scan for {search_type} {query!r}")
+        print(f"{search_type:8} {len(queries)} queries, results match: "
+              f"full scan {scan_time / len(queries) * 1000:7.2f} ms/query, "
+              f"trigram {index_time / len(queries) * 1000:7.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
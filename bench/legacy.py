@@ -0,0 +1,77 @@
+import re
+
+'''
+the original per-line parsing loop, kept verbatim so benchmarks have a baseline
+to time against and something to check the new parsers' output against.
+'''
+
+
+def legacy_parse_lines(content: list, file_name: str) -> dict:
+    SCENE_PATTERN = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s.+$"
+    CONTENT_PATTERN = r"\["
+    SYNOPSIS_PATTERN = r"^=\s+(.+)$"
+
+    new_data = {
+        "episode": file_name,
+        "scenes": []
+    }
+
+    def parse_scene_heading(line: str) -> dict | None:
+        pattern = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s(.+?)\s-\s(.+?)\s(#\d+#)$"
+        match = re.match(pattern, line)
+        if match:
+            return {
+                "setting": match.group(1),
+                "location": match.group(2),
+                "TOD": match.group(3),
+                "identifier": match.group(4),
+            }
+        return None
+
+    def parse_content_line(line: str) -> list | None:
+        line = line.replace('[', '').replace(']', '')
+        result = line.split(',')
+        return result if result else None
+
+    current_scene = None
+    scene_count = 0
+    current_synopsis = ""
+
+    for line in content:
+        # Check for synopsis
+        synopsis_match = re.match(SYNOPSIS_PATTERN, line)
+        if synopsis_match:
+            current_synopsis = synopsis_match.group(1).strip()
+            continue
+
+        # Match scene headings
+        if re.match(SCENE_PATTERN, line):
+            scene_count += 1
+            scene_data = parse_scene_heading(line)
+            if scene_data:
+                current_scene = {
+                    "scene_number": scene_count,
+                    "scene_heading": line,
+                    "synopsis": current_synopsis,
+                    "setting": scene_data["setting"],
+                    "location": scene_data["location"],
+                    "TOD": scene_data["TOD"],
+                    "artists": []
+                }
+                new_data["scenes"].append(current_scene)
+                current_synopsis = ""
+
+        # Match content lines
+        elif re.match(CONTENT_PATTERN, line) and current_scene:
+            result = parse_content_line(line)
+            if result:
+                artist = result[0].strip()
+                costume = result[1].strip()
+                props = result[2].strip() if len(result) > 2 else ""
+                current_scene["artists"].append({
+                    "artist": artist,
+                    "costume": costume,
+                    "props": props
+                })
+
+    return new_data
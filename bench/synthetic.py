@@ -0,0 +1,105 @@
+import argparse
+import os
+import random
+
+'''
+tiny synthetic fountain generator for the benchmarks. it's not a real screenplay,
+just the line shapes the parser cares about mixed with plenty of dialogue noise.
+write_corpus (or running this file) writes a whole season of .fountain episodes with a
+recurring cast, a fixed set of locations and episode lengths that vary around `scenes`.
+usage: python bench/synthetic.py out_dir [--episodes N] [--scenes N] [--artists N] [--synopsis R] ...
+'''
+
+SETTINGS = ["EXT.", "INT.", "EXT/INT.", "INT/EXT."]
+TODS = ["DAY", "NIGHT", "MORNING", "EVENING", "CONTINUOUS"]
+LOCATIONS = ["Rooftop", "Police Station", "Old Market", "Riverside", "Hospital Corridor",
+             "Train Platform", "Kitchen", "Warehouse", "School Gate", "Tea Stall"]
+FIRST = ["Rahim", "Karim", "Nusrat", "Farhana", "Tanvir", "Sabbir", "Mim", "Arif", "Lamia", "Jamal"]
+LAST = ["Ahmed", "Hossain", "Khan", "Chowdhury", "Islam", "Rahman", "Akter", "Sarkar"]
+COSTUMES = ["blue shirt", "saree", "police uniform", "hoodie", "lungi", "suit"]
+PROPS = ["phone", "umbrella", "file folder", "", "tea cup", "bag"]
+
+
+SYLLABLES = ["ra", "him", "ka", "rim", "nus", "rat", "far", "ha", "na", "tan", "vir", "sab", "bir",
+             "la", "mi", "a", "rif", "ja", "mal", "chow", "dhu", "ry", "is", "lam", "sar", "kar"]
+
+
+def random_names(count: int, seed: int = 0, words: int = 2) -> list:
+    """`count` distinct made-up names, for corpora with a realistic number of distinct artists/locations."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        parts = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title() for _ in range(words)]
+        names.add(" ".join(parts))
+    return sorted(names)
+
+
+def synthetic_episode(scenes: int = 40, artists_per_scene: int = 4, dialogue_lines: int = 8,
+                      synopsis_ratio: float = 0.7, seed: int = 0, cast: list = None, locations: list = None) -> str:
+    rng = random.Random(seed)
+    locations = locations or LOCATIONS
+    lines = ["Title: Synthetic Episode", ""]
+    for number in range(1, scenes + 1):
+        if rng.random() < synopsis_ratio:
+            lines.append(f"= scene {number} synopsis, something happens here")
+        lines.append(f"{rng.choice(SETTINGS)} {rng.choice(locations)} - {rng.choice(TODS)} #{number}#")
+        lines.append("")
+        for _ in range(artists_per_scene):
+            name = rng.choice(cast) if cast else f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+            lines.append(f"[{name}, {rng.choice(COSTUMES)}, {rng.choice(PROPS)}]")
+        lines.append("")
+        for _ in range(dialogue_lines):
+            speaker = rng.choice(FIRST).upper()
+            lines.append(speaker)
+            lines.append("I really don't think that is a good idea, not tonight.")
+            lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_bundle(episodes: int, **kwargs) -> str:
+    """Several episodes back to back, like the season bundles."""
+    return "".join(synthetic_episode(seed=seed, **kwargs) for seed in range(episodes))
+
+
+def write_corpus(directory: str, episodes: int, scenes: int = 40, artists_per_scene: int = 4,
+                 dialogue_lines: int = 8, synopsis_ratio: float = 0.7, cast_size: int = 300,
+                 location_count: int = 80, seed: int = 0) -> list:
+    """Writes ep<n>.fountain files to `directory` and returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    cast = random_names(cast_size, seed=seed + 1)
+    locations = random_names(location_count, seed=seed + 2, words=1)
+    paths = []
+    for number in range(episodes):
+        # Episodes run 25% shorter or longer than the average
+        length = max(1, round(scenes * rng.uniform(0.75, 1.25)))
+        text = synthetic_episode(scenes=length, artists_per_scene=artists_per_scene, dialogue_lines=dialogue_lines,
+                                 synopsis_ratio=synopsis_ratio, seed=seed * 1000003 + number,
+                                 cast=cast, locations=locations)
+        path = os.path.join(directory, f"ep{number}.fountain")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic season of .fountain episodes.")
+    parser.add_argument('directory', type=str, help="Output directory.")
+    parser.add_argument('--episodes', type=int, default=100)
+    parser.add_argument('--scenes', type=int, default=40, help="Average scenes per episode.")
+    parser.add_argument('--artists', type=int, default=4, help="Artists per scene.")
+    parser.add_argument('--dialogue', type=int, default=8, help="Dialogue lines per scene.")
+    parser.add_argument('--synopsis', type=float, default=0.7, help="Share of scenes with a synopsis line.")
+    parser.add_argument('--cast', type=int, default=300, help="Distinct artist names.")
+    parser.add_argument('--locations', type=int, default=80, help="Distinct locations.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.directory, args.episodes, args.scenes, args.artists, args.dialogue,
+                         args.synopsis, args.cast, args.locations, args.seed)
+    print(f"Wrote {len(paths)} episode(s) to '{args.directory}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import json
+import sys
+
+'''
+compact in-memory model for long-lived processes (gui, shell, serve).
+a loaded scene is a dict with seven keys and every artist appearance a dict of its own;
+here they are __slots__ objects, and the values that repeat all over a season (settings,
+times of day, locations, artist names, costumes, props) are interned so each distinct
+string is stored once. the objects answer scene["location"] / scene.get("synopsis", "")
+like the dicts did, so the search, index and formatting code runs on either unchanged,
+and json_default turns them back into the same dicts (same key order) when written out.
+'''
+
+SCENE_KEYS = ("scene_number", "scene_heading", "synopsis", "setting", "location", "TOD", "artists")
+APPEARANCE_KEYS = ("artist", "costume", "props")
+
+# Older data files and the sqlite backend have scenes without a synopsis key
+_SCENE_SHAPES = {SCENE_KEYS, tuple(key for key in SCENE_KEYS if key != "synopsis")}
+
+_intern = sys.intern
+
+
+class Appearance:
+    __slots__ = APPEARANCE_KEYS
+
+    def __init__(self, artist: str, costume: str, props: str):
+        self.artist = _intern(artist)
+        self.costume = _intern(costume)
+        self.props = _intern(props)
+
+    def __getitem__(self, key):
+        if key in APPEARANCE_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in APPEARANCE_KEYS else default
+
+    def to_dict(self) -> dict:
+        return {"artist": self.artist, "costume": self.costume, "props": self.props}
+
+    def __reduce__(self):
+        # Pickled as constructor arguments: half the size of the slot state, interned again on load
+        return (Appearance, (self.artist, self.costume, self.props))
+
+
+class Scene:
+    __slots__ = SCENE_KEYS
+
+    def __init__(self, scene_number, scene_heading, synopsis, setting, location, TOD, artists):
+        self.scene_number = scene_number
+        self.scene_heading = scene_heading
+        self.synopsis = synopsis            # None: the scene has no synopsis key at all
+        self.setting = _intern(setting)
+        self.location = _intern(location)
+        self.TOD = _intern(TOD)
+        self.artists = artists
+
+    def __getitem__(self, key):
+        if key in SCENE_KEYS:
+            value = getattr(self, key)
+            if value is not None or key != "synopsis":
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in SCENE_KEYS and (key != "synopsis" or self.synopsis is not None)
+
+    def to_dict(self) -> dict:
+        scene = {"scene_number": self.scene_number, "scene_heading": self.scene_heading}
+        if self.synopsis is not None:
+            scene["synopsis"] = self.synopsis
+        scene.update({"setting": self.setting, "location": self.location, "TOD": self.TOD,
+                      "artists": self.artists})
+        return scene
+
+    def __reduce__(self):
+        return (Scene, (self.scene_number, self.scene_heading, self.synopsis, self.setting, self.location,
+                        self.TOD, self.artists))
+
+
+def plain_appearance(artist, costume, props) -> dict:
+    """Appearance's constructor arguments as the plain dict (used to unpickle into dicts)."""
+    return {"artist": artist, "costume": costume, "props": props}
+
+
+def plain_scene(scene_number, scene_heading, synopsis, setting, location, TOD, artists) -> dict:
+    scene = {"scene_number": scene_number, "scene_heading": scene_heading}
+    if synopsis is not None:
+        scene["synopsis"] = synopsis
+    scene.update({"setting": setting, "location": location, "TOD": TOD, "artists": artists})
+    return scene
+
+
+def compact_object(obj: dict):
+    """
+    A compact Scene/Appearance for a dict of the usual shape; anything else (other keys,
+    a null synopsis, non-string values) is returned as is, so writing it back never changes it.
+    """
+    keys = tuple(obj)
+    try:
+        if keys == APPEARANCE_KEYS:
+            return Appearance(obj["artist"], obj["costume"], obj["props"])
+        if keys in _SCENE_SHAPES and obj.get("synopsis", "") is not None:
+            return Scene(obj["scene_number"], obj["scene_heading"], obj.get("synopsis"), obj["setting"],
+                         obj["location"], obj["TOD"], [compact_object(artist) if type(artist) is dict else artist
+                                                       for artist in obj["artists"]])
+    except TypeError:
+        pass
+    return obj
+
+
+def compact_episode(entry: dict) -> dict:
+    """The episode dict itself stays (there are few of them); its scenes become compact."""
+    return {**entry, "scenes": [compact_object(scene) if type(scene) is dict else scene
+                                for scene in entry["scenes"]]}
+
+
+def compact_data(data: list) -> list:
+    return [compact_episode(entry) for entry in data]
+
+
+def load_compact_json(json_file: str) -> list:
+    """json.load straight into the compact model, so the full dict version never exists at once."""
+    with open(json_file, "r", encoding="utf-8") as f:
+        # Innermost objects come first, so a scene's artists are already compact when it is built
+        return json.load(f, object_hook=compact_object)
+
+
+def json_default(obj):
+    """json.dump(..., default=json_default) writes compact objects as the dicts they came from."""
+    if isinstance(obj, (Scene, Appearance)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,67 @@
+from atomic_file import atomic_write
+
+from profiling import phase
+
+'''
+the "Format" markdown layout (# EP / - [ ] Scene checklists), one episode at a time.
+joining every episode's lines with "\n" gives the same text the gui used to build in one go,
+so callers can render or write it in pieces without holding the whole document.
+export_markdown writes it to disk for the gui's Export button and the cli's exportMd.
+'''
+
+# Bytes collected before each write to the output file
+WRITE_BUFFER = 1 << 16
+
+
+def format_episode_lines(episode: dict):
+    """The formatted lines of one episode, without line endings."""
+    # Add episode header
+    yield f"# EP {episode['episode']}\n"
+    yield "## scenes :\n"
+
+    # Process each scene
+    for scene in episode['scenes']:
+        # Scene header with checkbox
+        yield f"- [ ] Scene {scene['scene_number']}:  "
+
+        # Synopsis and scene details
+        yield f"\tSynopsis : {scene.get('synopsis', '')}  "
+        yield f"\t\tlocation : {scene['location']}  "
+        yield f"\t\tsetting : {scene['setting'].replace('.', '')}  "
+        yield f"\t\tTOD : {scene['TOD']}  "
+
+        # Artists section
+        yield "\tArtists  "
+
+        # Process each artist
+        for idx, artist in enumerate(scene['artists'], 1):
+            yield f"\t- artist_{idx} : {artist['artist']}"
+            yield f"\t\t- costume : {artist['costume']}"
+            yield f"\t\t- props : {artist['props']}"
+
+        yield ""  # Add blank line between scenes
+
+
+def format_chunks(data):
+    """One string per episode; "".join() of them is the full formatted document."""
+    for idx, episode in enumerate(data):
+        with phase("formatting"):
+            text = "\n".join(format_episode_lines(episode))
+        yield text if idx == 0 else "\n" + text
+
+
+def export_markdown(data, output_file: str, on_episode=None) -> int:
+    """
+    Writes the formatted document for `data` straight to `output_file`, an episode at a time,
+    so the full text is never held in memory. on_episode(count) is called after each episode
+    (e.g. to report progress or stop by raising); a stopped export leaves no partial file.
+    Returns the number of episodes written.
+    """
+    count = 0
+    with atomic_write(output_file, encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        for chunk in format_chunks(data):
+            f.write(chunk)
+            count += 1
+            if on_episode:
+                on_episode(count)
+    return count
@@ -0,0 +1,175 @@
+import mmap
+import os
+import re
+
+from profiling import timed_iter
+
+'''
+shared fountain parsing used by the cli and both gui versions.
+every line is dispatched on its first character, so most lines never touch a regex,
+and the few patterns we still need are compiled once at import time.
+'''
+
+# Token kinds emitted by tokenize_lines
+SYNOPSIS = "synopsis"
+SCENE = "scene"
+CONTENT = "content"
+
+# "= some synopsis"
+SYNOPSIS_RE = re.compile(r"^=\s+(.+)$")
+
+# Scene heading in one pass: the first branch captures setting/location/TOD/identifier,
+# the second branch still recognises a heading that doesn't follow the full layout
+# (those count as a scene number but don't open a new scene, same as before).
+SCENE_RE = re.compile(r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s(?:(.+?)\s-\s(.+?)\s(#\d+#)|.+)$")
+
+
+def tokenize_lines(lines):
+    """
+    Yields (kind, line, match) tokens for the lines that matter to the parser.
+    Anything that isn't a synopsis, scene heading or [artist, costume, props] line is dropped.
+    """
+    synopsis_match = SYNOPSIS_RE.match
+    scene_match = SCENE_RE.match
+
+    for line in lines:
+        if not line:
+            continue
+        first = line[0]
+
+        if first == "=":
+            match = synopsis_match(line)
+            if match:
+                yield SYNOPSIS, line, match
+        elif first == "E" or first == "I":
+            match = scene_match(line)
+            if match:
+                yield SCENE, line, match
+        elif first == "[":
+            yield CONTENT, line, None
+
+
+def parse_content_line(line: str) -> list:
+    line = line.replace('[', '').replace(']', '')
+    return line.split(',')
+
+
+def iter_scenes(tokens):
+    """
+    Yields finished scene dicts from tokenize_lines output.
+    A scene is only handed out once the next scene heading (or the end of the input) is reached,
+    so its artist list is complete.
+    """
+    current_scene = None
+    scene_count = 0
+    current_synopsis = ""
+
+    for kind, line, match in tokens:
+        if kind is SYNOPSIS:
+            current_synopsis = match.group(1).strip()
+
+        elif kind is SCENE:
+            scene_count += 1
+            setting, location, tod, identifier = match.groups()
+            if identifier is not None:
+                if current_scene:
+                    yield current_scene
+                current_scene = {
+                    "scene_number": scene_count,
+                    "scene_heading": line,
+                    "synopsis": current_synopsis,
+                    "setting": setting,
+                    "location": location,
+                    "TOD": tod,
+                    "artists": []
+                }
+                current_synopsis = ""  # Reset synopsis for next scene
+
+        elif current_scene:
+            result = parse_content_line(line)
+            current_scene["artists"].append({
+                "artist": result[0].strip(),
+                "costume": result[1].strip(),
+                "props": result[2].strip() if len(result) > 2 else ""
+            })
+
+    if current_scene:
+        yield current_scene
+
+
+def iter_file_lines(input_file: str):
+    """Reads a file lazily, splitting lines exactly like str.splitlines() on the whole text."""
+    with open(input_file, "r", encoding="utf-8") as f:
+        for raw in timed_iter("file read", f):
+            yield from raw.splitlines()
+
+
+def iter_fountain_scenes(input_file: str):
+    """Streams scene dicts out of a Fountain file without reading it all into memory."""
+    return timed_iter("line parsing", iter_scenes(tokenize_lines(iter_file_lines(input_file))))
+
+
+# Byte-level prefilter for the mmap parser: only lines that could be a synopsis,
+# a scene heading or an [artist, costume, props] line are ever decoded.
+# Anchoring on a literal "\n" (instead of "^" with MULTILINE) lets the regex engine
+# skip ahead with a fast literal search; the very first line is checked on its own.
+CANDIDATE_LINE = rb"(?:=|EXT\.|INT\.|EXT/INT\.|INT/EXT\.|\[)[^\r\n]*"
+FIRST_CANDIDATE_RE = re.compile(CANDIDATE_LINE)
+CANDIDATE_RE = re.compile(rb"\n(" + CANDIDATE_LINE + rb")")
+
+# Line breaks that str.splitlines() honours but a byte-level scan on "\n" doesn't see
+# (\v, \f, \x1c-\x1e, NEL, the unicode line/paragraph separators and a lone \r)
+UNUSUAL_BREAKS = (b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+LONE_CR_RE = re.compile(rb"\r(?!\n)")
+
+
+def _has_unusual_breaks(mm) -> bool:
+    if any(mm.find(sep) != -1 for sep in UNUSUAL_BREAKS):
+        return True
+    return mm.find(b"\r") != -1 and LONE_CR_RE.search(mm) is not None
+
+
+def iter_mmap_lines(input_file: str):
+    """
+    Memory-maps a file and yields only the decoded candidate lines.
+    Files with unusual line breaks fall back to iter_file_lines so the result never changes.
+    """
+    with open(input_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _has_unusual_breaks(mm):
+                yield from iter_file_lines(input_file)
+                return
+            first = FIRST_CANDIDATE_RE.match(mm)
+            if first:
+                yield first.group().decode("utf-8")
+            for match in CANDIDATE_RE.finditer(mm):
+                yield match.group(1).decode("utf-8")
+
+
+def iter_fountain_scenes_mmap(input_file: str):
+    """Like iter_fountain_scenes, but for very large files: scans the raw bytes through mmap."""
+    lines = timed_iter("file read", iter_mmap_lines(input_file))
+    return timed_iter("line parsing", iter_scenes(tokenize_lines(lines)))
+
+
+def episode_name(input_file: str) -> str:
+    return os.path.basename(input_file).split('.')[0]
+
+
+def parse_fountain_text(text: str, episode: str) -> dict:
+    """Parses the text of a whole Fountain script into an episode dict."""
+    return {
+        "episode": episode,
+        "scenes": list(timed_iter("line parsing", iter_scenes(tokenize_lines(text.splitlines()))))
+    }
+
+
+def parse_fountain_file(input_file: str, use_mmap: bool = False) -> dict:
+    """Reads a Fountain file and returns its episode dict (nothing is written)."""
+    scenes = iter_fountain_scenes_mmap(input_file) if use_mmap else iter_fountain_scenes(input_file)
+    return {
+        "episode": episode_name(input_file),
+        "scenes": list(scenes)
+    }
@@ -0,0 +1,142 @@
+import re
+
+'''
+fuzzy matching for misspelled artist/location searches.
+edit_distance is levenshtein distance computed bit-parallel (myers/hyyrö): the pattern is a
+bitmask per character, so comparing against a name costs a few integer operations per
+character instead of a full table. a FuzzyIndex files the distinct strings under their
+one-character deletions, so a query only measures the handful of strings it shares a key with.
+'''
+
+# Words shorter than this are too unspecific to match on their own ("of", "jr")
+MIN_WORD = 3
+
+# The query variants needed grow with the alphabet to the power of the distance
+MAX_DISTANCE = 2
+
+_WORD = re.compile(r"\w+")
+
+
+def default_max_distance(query: str) -> int:
+    """Edits allowed for a query of this length: none below 3 characters, 1 up to 5, then 2."""
+    if len(query) < MIN_WORD:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+def words(value: str) -> list:
+    """The words of a name or query, in order ("o'brien, jr." -> ["o", "brien", "jr"])."""
+    return _WORD.findall(value)
+
+
+def _pattern(pattern: str) -> dict:
+    # Bitmask of the positions of each character
+    bits = {}
+    for idx, char in enumerate(pattern):
+        bits[char] = bits.get(char, 0) | (1 << idx)
+    return bits
+
+
+def _distance(bits: dict, length: int, text: str) -> int:
+    if not length:
+        return len(text)
+    mask = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv, mv, score = mask, 0, length
+    for char in text:
+        eq = bits.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def edit_distance(a: str, b: str) -> int:
+    return _distance(_pattern(a), len(a), b)
+
+
+class FuzzyIndex:
+    """
+    SymSpell-style deletion index over a set of terms: every term is filed under itself and
+    each string left by removing one of its characters. Two strings are within one edit of
+    each other exactly when they share such a key, so a query for distance 1 only looks up its
+    own keys; for distance 2 the query is first varied by one edit (using the characters the
+    terms are made of). Candidates are then measured exactly, so nothing is missed or wrongly kept.
+    """
+
+    def __init__(self):
+        self.keys = {}          # key -> term, or list of terms when several share it
+        self.alphabet = set()
+
+    def add(self, term: str) -> None:
+        if term in _as_list(self.keys.get(term)):
+            return
+        self.alphabet.update(term)
+        for key in _deletes(term):
+            current = self.keys.get(key)
+            if current is None:
+                self.keys[key] = term
+            elif type(current) is str:
+                self.keys[key] = [current, term]
+            else:
+                current.append(term)
+
+    def search(self, query: str, max_distance: int) -> list:
+        """(term, distance) for every term within max_distance (0-2) edits of query, in no particular order."""
+        if max_distance > MAX_DISTANCE:
+            raise ValueError(f"max_distance can be at most {MAX_DISTANCE}")
+        if max_distance == 0:
+            return [(query, 0)] if query in _as_list(self.keys.get(query)) else []
+
+        variants = {query}
+        if max_distance == 2:
+            variants |= _one_edit(query, self.alphabet)
+        lookups = set()
+        for variant in variants:
+            lookups |= _deletes(variant)
+
+        bits, length = _pattern(query), len(query)
+        found = []
+        seen = set()
+        for key in lookups:
+            for term in _as_list(self.keys.get(key)):
+                if term in seen:
+                    continue
+                seen.add(term)
+                if abs(len(term) - length) <= max_distance:
+                    distance = _distance(bits, length, term)
+                    if distance <= max_distance:
+                        found.append((term, distance))
+        return found
+
+
+def _as_list(entry) -> list:
+    if entry is None:
+        return []
+    return [entry] if type(entry) is str else entry
+
+
+def _deletes(term: str) -> set:
+    # The term and each string left by removing one character
+    return {term} | {term[:idx] + term[idx + 1:] for idx in range(len(term))}
+
+
+def _one_edit(term: str, alphabet: set) -> set:
+    # Every string one deletion, substitution or insertion away (new characters from `alphabet`)
+    variants = {term[:idx] + term[idx + 1:] for idx in range(len(term))}
+    for idx in range(len(term) + 1):
+        head, tail = term[:idx], term[idx:]
+        for char in alphabet:
+            variants.add(head + char + tail)
+            if tail:
+                variants.add(head + char + tail[1:])
+    return variants
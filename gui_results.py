@@ -0,0 +1,111 @@
+from profiling import timed
+from search_results import by_episode
+
+'''
+lazy search-results tree for the gui. the treeview only ever holds what the user can see:
+episodes are added a page at a time, an episode's scenes are added when it is opened and a
+scene's artists when the scene is opened. a search with tens of thousands of hits costs the
+same to show as one with ten. a fuzzy search gets one more level on top: the close names
+(or locations) in rank order, each opening to its episodes.
+'''
+
+PAGE_SIZE = 200
+
+# Child shown under a closed node so tk draws the expand arrow
+PLACEHOLDER = "..."
+
+
+class ResultsTree:
+    def __init__(self, tree):
+        self.tree = tree
+        self.groups = []         # (kind, text, matches) of the top-level rows
+        self._shown = 0
+        self._payload = {}       # item id -> ("value"/"episode", matches) / ("scene", match) / ("more", None)
+        self._more_item = None
+
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    @timed("result rendering")
+    def show(self, matches: list) -> None:
+        """Shows search_results.Match records, grouped by episode."""
+        self.clear()
+        self.groups = [("episode", episode, group) for episode, group in by_episode(matches)]
+        self._add_page()
+
+    @timed("result rendering")
+    def show_ranked(self, ranked: list) -> None:
+        """Shows a fuzzy search (storage.ranked_matches): a row per close name, closest first."""
+        self.clear()
+        self.groups = [("value", f"{value}  (distance {distance})", matches) for value, distance, matches in ranked]
+        self._add_page()
+
+    def clear(self) -> None:
+        self.tree.delete(*self.tree.get_children())
+        self.groups = []
+        self._payload = {}
+        self._shown = 0
+        self._more_item = None
+
+    def _add_page(self) -> None:
+        if self._more_item is not None:
+            self.tree.delete(self._more_item)
+            self._more_item = None
+
+        page = self.groups[self._shown:self._shown + PAGE_SIZE]
+        for kind, text, matches in page:
+            self._insert_group("", kind, text, matches)
+        self._shown += len(page)
+
+        remaining = len(self.groups) - self._shown
+        if remaining > 0:
+            self._more_item = self.tree.insert("", "end", text=f"Show {min(remaining, PAGE_SIZE)} more...",
+                                               values=(f"{remaining} episode(s) not shown",))
+            self._payload[self._more_item] = ("more", None)
+
+    def _insert_group(self, parent: str, kind: str, text: str, matches: list) -> None:
+        item = self.tree.insert(parent, "end", text=text, values=(f"{len(matches)} scene(s)",))
+        self._payload[item] = (kind, matches)
+        self.tree.insert(item, "end", text=PLACEHOLDER)
+
+    def _fill(self, item: str) -> None:
+        kind, payload = self._payload.get(item, (None, None))
+        children = self.tree.get_children(item)
+        if kind not in ("value", "episode", "scene") or len(children) != 1 or self.tree.item(children[0], "text") != PLACEHOLDER:
+            return
+        self.tree.delete(children[0])
+
+        if kind == "value":
+            for episode, group in by_episode(payload):
+                self._insert_group(item, "episode", episode, group)
+        elif kind == "episode":
+            for match in payload:
+                scene = match.scene
+                child = self.tree.insert(
+                    item, "end", text=f"Scene {scene['scene_number']}",
+                    values=(f"{scene['setting']}, {scene['TOD']} | {scene['location']} | {scene.get('synopsis', '')}",)
+                )
+                self._payload[child] = ("scene", match)
+                self.tree.insert(child, "end", text=PLACEHOLDER)
+        else:
+            if payload.artist is not None:
+                self._insert_artist(item, "artist_name", payload.artist)
+                label = "other_artist"
+            else:
+                label = "artist"
+            for idx, artist in enumerate(payload.others, 1):
+                self._insert_artist(item, f"{label}_{idx}", artist)
+
+    def _insert_artist(self, parent: str, label: str, artist: dict) -> None:
+        self.tree.insert(parent, "end", text=f"{label} : {artist['artist']}",
+                         values=(f"costume : {artist['costume']} | props : {artist['props']}",))
+
+    def _on_open(self, event) -> None:
+        item = self.tree.focus()
+        if item:
+            self._fill(item)
+
+    def _on_select(self, event) -> None:
+        item = self.tree.focus()
+        if item and item == self._more_item:
+            self._add_page()
@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+
+'''
+runs slow gui work (parsing, loading, searching) on a worker thread so the tk window
+stays responsive. the worker never touches tk: everything it wants shown goes through
+a queue that the main thread polls with root.after. work that must run on the tk thread
+itself is cut into small steps instead, run a few at a time between events.
+'''
+
+POLL_MS = 50
+
+# Time slice for tk-thread steps before giving the event loop back
+STEP_MS = 30
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once the user has pressed Cancel."""
+
+
+class TaskRunner:
+    def __init__(self, root, progress, label, cancel_btn):
+        self.root = root
+        self.progress = progress
+        self.label = label
+        self.cancel_btn = cancel_btn
+        self.messages = queue.Queue()
+        self._cancel = None
+        self._on_done = None
+
+    @property
+    def busy(self) -> bool:
+        return self._cancel is not None
+
+    def start(self, text: str, work, on_done) -> bool:
+        """
+        Runs work(task) on a worker thread, then on_done(status, payload) on the tk thread,
+        where status is "done" (payload = work's result), "cancelled" or "error" (payload = exception).
+        Returns False without starting anything if another task is still running.
+        """
+        if self.busy:
+            return False
+        self._cancel = threading.Event()
+        self._on_done = on_done
+        self.label.config(text=text)
+        self.progress.start(10)
+        self.cancel_btn.configure(state="normal")
+
+        def run():
+            try:
+                self.messages.put(("done", work(self)))
+            except TaskCancelled:
+                self.messages.put(("cancelled", None))
+            except Exception as e:
+                self.messages.put(("error", e))
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(POLL_MS, self._poll)
+        return True
+
+    def start_steps(self, text: str, steps, total: int, on_done) -> bool:
+        """
+        For work that has to touch tk (e.g. filling a Text widget): runs the `steps` iterator
+        on the tk thread, as many items as fit in STEP_MS per after() callback, with the
+        progress bar counting items up to `total`. on_done is called as for start().
+        """
+        if self.busy:
+            return False
+        self._cancel = threading.Event()
+        self._on_done = on_done
+        self.label.config(text=text)
+        self.progress.configure(mode="determinate", maximum=max(total, 1), value=0)
+        self.cancel_btn.configure(state="normal")
+        self.root.after(0, self._step, text, iter(steps), total, 0)
+        return True
+
+    # Called from the worker thread
+    def check_cancelled(self) -> None:
+        if self._cancel is not None and self._cancel.is_set():
+            raise TaskCancelled()
+
+    def report(self, text: str) -> None:
+        self.messages.put(("progress", text))
+
+    # Called from the tk thread
+    def cancel(self) -> None:
+        if self._cancel is not None:
+            self._cancel.set()
+            self.label.config(text="Cancelling...")
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                status, payload = self.messages.get_nowait()
+                if status == "progress":
+                    self.label.config(text=payload)
+                    continue
+                self._finish(status, payload)
+                return
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self._poll)
+
+    def _step(self, text: str, steps, total: int, done: int) -> None:
+        deadline = time.perf_counter() + STEP_MS / 1000
+        try:
+            while time.perf_counter() < deadline:
+                if self._cancel.is_set():
+                    self._finish("cancelled", None)
+                    return
+                next(steps)
+                done += 1
+        except StopIteration:
+            self._finish("done", done)
+            return
+        except Exception as e:
+            self._finish("error", e)
+            return
+        self.progress.configure(value=done)
+        self.label.config(text=f"{text} {done}/{total}")
+        self.root.after(1, self._step, text, steps, total, done)
+
+    def _finish(self, status: str, payload) -> None:
+        on_done = self._on_done
+        self._cancel = self._on_done = None
+        self.progress.stop()
+        self.progress.configure(mode="indeterminate", value=0)
+        self.cancel_btn.configure(state="disabled")
+        self.label.config(text="Cancelled" if status == "cancelled" else "Ready")
+        on_done(status, payload)
@@ -1,10 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
+import argparse
 import os
-import re
 import sys
 
+import profiling
+from formatting import export_markdown, format_chunks
+from gui_results import ResultsTree
+from gui_tasks import TaskRunner
+from query import format_query, parse_query
+from search_results import export_file_name, find_matches, flatten_ranked, render_markdown, render_text
+from storage import DataCache, default_data_file
+
 
 # '''
 # from the dev : hi? if you are reading this, you are probably a developer or a curious person.
@@ -35,6 +42,8 @@ class ScriptManagerGUI:
         
         self.notebook.add(self.add_episode_tab, text="Add Episode")
         self.notebook.add(self.search_tab, text="Search")
+        # Progress bar / cancel button for background work, below the tabs
+        self._setup_task_bar()
         self.notebook.pack(expand=True, fill="both", padx=10, pady=5)
         
         # Setup both tabs
@@ -42,12 +51,80 @@ class ScriptManagerGUI:
         self._setup_search_tab()
         
         # JSON file path
-        self.json_file = "data.json"
+        self.json_file = default_data_file()
+
+        # Loaded data stays in memory; it is re-read only when the file changes on disk
+        self.data_cache = DataCache(self.json_file)
         
-        # Store search results
+        # Store search results (match records) and what was searched
         self.current_results = []
+        self.current_search_type = None
         self.current_search_term = ""
 
+    def _setup_task_bar(self):
+        task_frame = ttk.Frame(self.root)
+        task_frame.pack(side="bottom", fill="x", padx=10, pady=5)
+
+        self.task_label = ttk.Label(task_frame, text="Ready", width=30)
+        self.task_label.pack(side="left", padx=5)
+
+        self.progress_bar = ttk.Progressbar(task_frame, mode="indeterminate")
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+
+        self.cancel_btn = ttk.Button(task_frame, text="Cancel", command=self._cancel_task, state="disabled")
+        self.cancel_btn.pack(side="left", padx=5)
+
+        # Phase timings (profiling.py): off until ticked, or from the start with --profile
+        self.profile_var = tk.BooleanVar(value=profiling.enabled)
+        ttk.Checkbutton(task_frame, text="Profile", variable=self.profile_var,
+                        command=self._toggle_profile).pack(side="left", padx=5)
+        ttk.Button(task_frame, text="Stats", command=self._show_stats).pack(side="left", padx=5)
+
+        self.tasks = TaskRunner(self.root, self.progress_bar, self.task_label, self.cancel_btn)
+
+    def _cancel_task(self):
+        self.tasks.cancel()
+
+    def _toggle_profile(self):
+        profiling.enable(self.profile_var.get())
+
+    def _show_stats(self):
+        """Shows where the time went (load, parse, dump, search, render...) since the last reset."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Stats")
+        dialog.geometry("480x300")
+        dialog.transient(self.root)
+
+        frame = ttk.Frame(dialog, padding=10)
+        frame.pack(fill="both", expand=True)
+
+        stats_text = tk.Text(frame, height=12, wrap=tk.NONE, font=("Courier", 10))
+        stats_text.pack(fill="both", expand=True)
+
+        def refresh():
+            stats_text.delete(1.0, tk.END)
+            if not profiling.enabled and not profiling.report():
+                stats_text.insert(tk.END, "Tick \"Profile\" and run a task to record timings.")
+            else:
+                stats_text.insert(tk.END, profiling.format_report())
+
+        def reset():
+            profiling.reset()
+            refresh()
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Refresh", command=refresh).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Reset", command=reset).pack(side="left", padx=5)
+        refresh()
+
+    def _is_busy(self) -> bool:
+        """Tells the user to wait while a background task still owns the data."""
+        if self.tasks.busy:
+            messagebox.showinfo("Busy", "Please wait for the current task to finish, or cancel it.")
+            return True
+        return False
+
     def _setup_add_episode_tab(self):
         # File selection frame
         file_frame = ttk.LabelFrame(self.add_episode_tab, text="Select Fountain File", padding=10)
@@ -82,75 +159,70 @@ class ScriptManagerGUI:
         self.status_text.pack(fill="both", expand=True, padx=10, pady=5)
 
     def _format_data(self):
-        """Format the data from data.json into the specified markdown format."""
-        try:
-            if not os.path.exists(self.json_file):
-                messagebox.showerror("Error", "data.json file not found!")
-                return
-                
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            formatted_text = []
-            
-            for episode in data:
-                # Add episode header
-                formatted_text.append(f"# EP {episode['episode']}\n")
-                formatted_text.append("## scenes :\n")
-                
-                # Process each scene
-                for scene in episode['scenes']:
-                    # Scene header with checkbox
-                    formatted_text.append(f"- [ ] Scene {scene['scene_number']}:  ")
-                    
-                    # Synopsis and scene details
-                    formatted_text.append(f"\tSynopsis : {scene.get('synopsis', '')}  ")
-                    formatted_text.append(f"\t\tlocation : {scene['location']}  ")
-                    formatted_text.append(f"\t\tsetting : {scene['setting'].replace('.', '')}  ")
-                    formatted_text.append(f"\t\tTOD : {scene['TOD']}  ")
-                    
-                    # Artists section
-                    formatted_text.append("\tArtists  ")
-                    
-                    # Process each artist
-                    for idx, artist in enumerate(scene['artists'], 1):
-                        formatted_text.append(f"\t- artist_{idx} : {artist['artist']}")
-                        formatted_text.append(f"\t\t- costume : {artist['costume']}")
-                        formatted_text.append(f"\t\t- props : {artist['props']}")
-                    
-                    formatted_text.append("")  # Add blank line between scenes
-                
-            # Display formatted text in status window
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, "\n".join(formatted_text))
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error formatting data: {str(e)}")
+        """
+        Format the data from data.json into the specified markdown format.
+        The data is loaded in the background, then written into the status window an episode
+        at a time between tk events, so the window stays usable and Cancel stops it midway.
+        """
+        if self._is_busy():
+            return
+        if not os.path.exists(self.json_file):
+            messagebox.showerror("Error", f"{self.json_file} file not found!")
+            return
+
+        self.status_text.delete(1.0, tk.END)
+
+        def formatted(status, payload):
+            if status == "error":
+                messagebox.showerror("Error", f"Error formatting data: {str(payload)}")
+
+        def loaded(status, payload):
+            if status == "done":
+                self.tasks.start_steps("Formatting episodes", self._format_steps(payload), len(payload), formatted)
+            elif status == "error":
+                messagebox.showerror("Error", f"Error formatting data: {str(payload)}")
+
+        self.tasks.start("Loading data...", lambda task: self.data_cache.data(), loaded)
+
+    def _format_steps(self, data: list):
+        """Appends one formatted episode to the status window per step."""
+        for chunk in format_chunks(data):
+            self.status_text.insert(tk.END, chunk)
+            yield
 
     def _export_formatted_data(self):
-        """Export the formatted data to a markdown file."""
-        try:
-            # Get the formatted content from the status text widget
-            formatted_content = self.status_text.get(1.0, tk.END)
-            
-            if not formatted_content.strip():
-                messagebox.showerror("Error", "Please format the data first!")
-                return
-            
-            # Open file dialog for saving
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".md",
-                filetypes=[("Markdown files", "*.md"), ("All files", "*.*")],
-                initialfile="formatted_script.md"
-            )
-            
-            if file_path:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(formatted_content)
+        """Export the formatted data to a markdown file, written straight from the database."""
+        if self._is_busy():
+            return
+        if not os.path.exists(self.json_file):
+            messagebox.showerror("Error", f"{self.json_file} file not found!")
+            return
+
+        # Open file dialog for saving
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".md",
+            filetypes=[("Markdown files", "*.md"), ("All files", "*.*")],
+            initialfile="formatted_script.md"
+        )
+        if not file_path:
+            return
+
+        def work(task):
+            data = self.data_cache.data()
+
+            def on_episode(count):
+                task.check_cancelled()
+                task.report(f"Exported {count}/{len(data)} episode(s)")
+
+            return export_markdown(data, file_path, on_episode)
+
+        def done(status, payload):
+            if status == "done":
                 messagebox.showinfo("Success", f"Data exported successfully to {file_path}")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error exporting data: {str(e)}")
+            elif status == "error":
+                messagebox.showerror("Error", f"Error exporting data: {str(payload)}")
+
+        self.tasks.start("Exporting...", work, done)
 # search
     def _setup_search_tab(self):
         # Search type selection
@@ -163,6 +235,12 @@ class ScriptManagerGUI:
                        variable=self.search_type, value="artist").pack(side="left", padx=5)
         ttk.Radiobutton(search_frame, text="Search by Location", 
                        variable=self.search_type, value="location").pack(side="left", padx=5)
+        ttk.Radiobutton(search_frame, text="Search by Query",
+                       variable=self.search_type, value="query").pack(side="left", padx=5)
+
+        # Fuzzy search: closest names by edit distance, for misspelled searches
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Allow typos", variable=self.fuzzy_var).pack(side="left", padx=15)
         
         # Search entry frame
         search_entry_frame = ttk.Frame(self.search_tab)
@@ -180,10 +258,26 @@ class ScriptManagerGUI:
         self.export_btn = ttk.Button(search_entry_frame, text="Export As", 
                                    command=self._show_export_dialog, state="disabled")
         self.export_btn.pack(side="left", padx=5)
+
+        # What a query looks like (several fields at once, see query.py)
+        ttk.Label(self.search_tab, text="Query: artist:rahim location:kitchen tod:night props:knife "
+                  "(also setting:, costume:, episode:)").pack(anchor="w", padx=15)
         
-        # Results text
-        self.results_text = tk.Text(self.search_tab, height=20, wrap=tk.WORD)
-        self.results_text.pack(fill="both", expand=True, padx=10, pady=5)
+        # Results tree with scrollbar (rows are only built when shown or expanded)
+        results_frame = ttk.Frame(self.search_tab)
+        results_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        results_scroll = ttk.Scrollbar(results_frame)
+        results_scroll.pack(side="right", fill="y")
+
+        self.results_tree = ttk.Treeview(results_frame, columns=("details",), height=20,
+                                         yscrollcommand=results_scroll.set)
+        self.results_tree.heading("#0", text="Result")
+        self.results_tree.heading("details", text="Details")
+        self.results_tree.column("#0", width=250, stretch=False)
+        self.results_tree.pack(side="left", fill="both", expand=True)
+        results_scroll.config(command=self.results_tree.yview)
+        self.results_view = ResultsTree(self.results_tree)
 #
     def _browse_file(self):
         filename = filedialog.askopenfilename(
@@ -218,95 +312,24 @@ class ScriptManagerGUI:
         ttk.Button(dialog, text="Markdown File (.md)", 
                   command=lambda: export_and_close("md")).pack(pady=5)
 
-    def _format_md_results(self, search_type, search_value, data):
-        """Format search results in markdown format."""
-        results = []
-        results.append(f"## search results for \"{search_value}\"")
-        
-        if search_type == "artist":
-            for entry in data:
-                episode_printed = False
-                for scene in entry["scenes"]:
-                    searched_artist = None
-                    other_artists = []
-                    
-                    for artist in scene["artists"]:
-                        if search_value.lower() in artist["artist"].lower():
-                            searched_artist = artist
-                        else:
-                            other_artists.append(artist)
-                    
-                    if searched_artist:
-                        if not episode_printed:
-                            results.append(f"\n# {entry['episode']}")
-                            episode_printed = True
-                        
-                        results.append(f"- [ ] Scene {scene['scene_number']} :  ")
-                        results.append(f"\tSynopsis : {scene.get('synopsis', '')}  ")
-                        results.append(f"\t\tlocation : {scene['location']}  ")
-                        results.append(f"\t\tsetting : {scene['setting'].replace('.', '')}  ")
-                        results.append(f"\t\tTOD : {scene['TOD']}  ")
-                        results.append("\n\t Artists  ")
-                        
-                        # Add searched artist
-                        results.append(f"\t- artist_1: {searched_artist['artist']}")
-                        results.append(f"\t\t- costume : {searched_artist['costume']}")
-                        results.append(f"\t\t- props : {searched_artist['props']}")
-                        
-                        # Add other artists
-                        for idx, artist in enumerate(other_artists, 2):
-                            results.append(f"\n\t- artist_{idx} : {artist['artist']}")
-                            results.append(f"\t\t- costume : {artist['costume']}")
-                            results.append(f"\t\t- props : {artist['props']}")
-                        results.append("")
-
-        elif search_type == "location":
-            for entry in data:
-                episode_printed = False
-                for scene in entry["scenes"]:
-                    if search_value.lower() in scene["location"].lower():
-                        if not episode_printed:
-                            results.append(f"\n# {entry['episode']}")
-                            episode_printed = True
-                        
-                        results.append(f"- [ ] Scene {scene['scene_number']}")
-                        results.append(f"  Synopsis: {scene.get('synopsis', '')}  ")
-                        results.append("\n\t Artists  ")
-                        
-                        for idx, artist in enumerate(scene["artists"], 1):
-                            results.append(f"\t- artist_{idx}: {artist['artist']}")
-                            results.append(f"\t\t- costume : {artist['costume']}")
-                            results.append(f"\t\t- props : {artist['props']}")
-                            if idx < len(scene["artists"]):
-                                results.append("")
-                        results.append("")
-
-        return "\n".join(results)
-
     def _export_results(self, format_type):
-        """Export results in the specified format."""
-        if not self.current_results:
+        """Export results in the specified format, rendered from the kept match records."""
+        if not self.current_results or self._is_busy():
             return
             
         try:
             if format_type == "txt":
-                # Use existing text format
-                content = "\n".join(self.current_results)
+                content = "\n".join(render_text(self.current_results, self.current_search_type,
+                                                self.current_search_term))
                 default_ext = ".txt"
                 file_types = [("Text files", "*.txt")]
             else:  # markdown format
-                # Load data and format as markdown
-                with open(self.json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                content = self._format_md_results(
-                    self.search_type.get(),
-                    self.current_search_term,
-                    data
-                )
+                content = render_markdown(self.current_results, self.current_search_type,
+                                          self.current_search_term)
                 default_ext = ".md"
                 file_types = [("Markdown files", "*.md")]
             
-            filename = f"search_results_{self.current_search_term}{default_ext}"
+            filename = export_file_name(self.current_search_term, default_ext)
             
             save_path = filedialog.asksaveasfilename(
                 defaultextension=default_ext,
@@ -326,176 +349,45 @@ class ScriptManagerGUI:
 
     def process_fountain_file(self, input_file: str) -> None:
         """Processes a Fountain script file and adds its data to the JSON file."""
-        # Constants
-        SCENE_PATTERN = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s.+$"
-        CONTENT_PATTERN = r"\["
-        SYNOPSIS_PATTERN = r"^=\s+(.+)$"
-
-        # Initialize data structure
-        file_name = os.path.basename(input_file).split('.')[0]
-        new_data = {
-            "episode": file_name,
-            "scenes": []
-        }
-
-        # Load existing data
-        if os.path.exists(self.json_file):
-            with open(self.json_file, "r", encoding="utf-8") as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        else:
-            existing_data = []
+        # Stream the scenes straight into the JSON file
+        file_name, added = self.data_cache.add_episode(input_file)
+        self._show_process_result(file_name, added)
 
-        # Check if file already processed
-        if any(entry["episode"] == file_name for entry in existing_data):
+    def _show_process_result(self, file_name: str, added: bool) -> None:
+        if not added:
             self.status_text.insert(tk.END, f"File '{file_name}' is already in the JSON file. Skipping.\n")
             return
 
-        def parse_scene_heading(line: str) -> dict:
-            pattern = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s(.+?)\s-\s(.+?)\s(#\d+#)$"
-            match = re.match(pattern, line)
-            if match:
-                return {
-                    "setting": match.group(1),
-                    "location": match.group(2),
-                    "TOD": match.group(3),
-                    "identifier": match.group(4),
-                }
-            return None
-
-        def parse_content_line(line: str) -> list:
-            line = line.replace('[', '').replace(']', '')
-            result = line.split(',')
-            return result if result else None
-
-        # Read and parse the Fountain file
-        with open(input_file, "r", encoding="utf-8") as f:
-            content = f.read().splitlines()
-
-        current_scene = None
-        scene_count = 0
-        current_synopsis = ""
-
-        for line in content:
-            # Check for synopsis
-            synopsis_match = re.match(SYNOPSIS_PATTERN, line)
-            if synopsis_match:
-                current_synopsis = synopsis_match.group(1).strip()
-                continue
-
-            # Match scene headings
-            if re.match(SCENE_PATTERN, line):
-                scene_count += 1
-                scene_data = parse_scene_heading(line)
-                if scene_data:
-                    current_scene = {
-                        "scene_number": scene_count,
-                        "scene_heading": line,
-                        "synopsis": current_synopsis,  # Add synopsis to scene data
-                        "setting": scene_data["setting"],
-                        "location": scene_data["location"],
-                        "TOD": scene_data["TOD"],
-                        "artists": []
-                    }
-                    new_data["scenes"].append(current_scene)
-                    current_synopsis = ""  # Reset synopsis for next scene
-
-            # Match content lines
-            elif re.match(CONTENT_PATTERN, line) and current_scene:
-                result = parse_content_line(line)
-                if result:
-                    artist = result[0].strip()
-                    costume = result[1].strip()
-                    props = result[2].strip() if len(result) > 2 else ""
-                    current_scene["artists"].append({
-                        "artist": artist,
-                        "costume": costume,
-                        "props": props
-                    })
-
-        # Append new data
-        existing_data.append(new_data)
-        with open(self.json_file, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=4)
-
         self.status_text.insert(tk.END, f"Data from '{file_name}' successfully added to '{self.json_file}'.\n")
 
     def lookup(self, search_type: str, search_value: str) -> None:
         """Performs the search and displays results."""
-        with open(self.json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        search_value = search_value.lower()
-        results = []
-        results.append("-" * 75)
-
-        if search_type == "artist":
-            results.append(f"Search Results for Artist: {search_value}")
-            for entry in data:
-                episode_printed = False
-                for scene in entry["scenes"]:
-                    searched_artist = None
-                    other_artists = []
-                    
-                    for artist in scene["artists"]:
-                        if search_value in artist["artist"].lower():
-                            searched_artist = artist
-                        else:
-                            other_artists.append(artist)
-                    
-                    if searched_artist:
-                        if not episode_printed:
-                            results.append(f"|_{entry['episode']}")
-                            episode_printed = True
-                            
-                        results.append(f"    |_synopsis : {scene.get('synopsis', '')}")
-                        results.append(f"    |_scene {scene['scene_number']} : {scene['setting']}, {scene['TOD']}")
-                        results.append(f"        |_location : {scene['location']}")
-                        results.append(f"            |_artist_name : {searched_artist['artist']}")
-                        results.append(f"                |_costume : {searched_artist['costume']}")
-                        results.append(f"                |_props : {searched_artist['props']}")
-                        
-                        for idx, artist in enumerate(other_artists, 1):
-                            results.append("     ")
-                            results.append(f"            |_other_artist_{idx} : {artist['artist']}")
-                            results.append(f"                |_costume : {artist['costume']}")
-                            results.append(f"                |_props : {artist['props']}")
-                        results.append("")
-
-        elif search_type == "location":
-            results.append(f"Search Results for Location: {search_value}")
-            for entry in data:
-                episode_printed = False
-                for scene in entry["scenes"]:
-                    if search_value in scene["location"].lower():
-                        if not episode_printed:
-                            results.append(f"|_{entry['episode']}")
-                            episode_printed = True
-                            
-                        results.append(f"    |_synopsis : {scene.get('synopsis', '')}")
-                        results.append(f"    |_scene {scene['scene_number']} : {scene['setting']}, {scene['TOD']}")
-                        for idx, artist in enumerate(scene["artists"], 1):
-                            results.append(f"            |_artist_{idx} : {artist['artist']}")
-                            results.append(f"                |_costume : {artist['costume']}")
-                            results.append(f"                |_props : {artist['props']}")
-                            if idx < len(scene["artists"]):
-                                results.append("     ")
-                        results.append("")
-
-        results.append("-" * 75)
-
+        matches = self._search_results(search_type, search_value)
+        self._show_results(matches, search_type, search_value.lower())
+
+    def _search_results(self, search_type: str, search_value: str, task=None) -> list:
+        """
+        The match records for a search, kept for the results tree and every export format;
+        safe to run on a worker thread (no tk calls).
+        """
+        data = self.data_cache.search(search_type, search_value)
+        return find_matches(data, search_type, search_value, task.check_cancelled if task else None)
+
+    def _show_results(self, matches: list, search_type: str, search_value: str, ranked: list = None) -> None:
         # Store results and search term
-        self.current_results = results
+        self.current_results = matches
+        self.current_search_type = search_type
         self.current_search_term = search_value
 
-        # Display results
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.insert(tk.END, "\n".join(results))
+        # Display results; only the first page of episodes is built right away
+        if ranked is None:
+            self.results_view.show(matches)
+        else:
+            # Fuzzy search: the close names first, each opening to its episodes
+            self.results_view.show_ranked(ranked)
         
         # Enable/disable download button based on results
-        if results and len(results) > 1:  # More than just the header
+        if matches:
             self.export_btn.configure(state="normal")
         else:
             self.export_btn.configure(state="disabled")
@@ -505,28 +397,81 @@ class ScriptManagerGUI:
         if not file_path:
             messagebox.showerror("Error", "Please select a file first")
             return
-            
-        try:
-            self.status_text.delete(1.0, tk.END)
-            self.process_fountain_file(file_path)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error processing file: {str(e)}")
+        if self._is_busy():
+            return
+
+        self.status_text.delete(1.0, tk.END)
+
+        def work(task):
+            def on_scene(count):
+                task.check_cancelled()
+                if count % 50 == 0:
+                    task.report(f"Processing... {count} scenes")
+            return self.data_cache.add_episode(file_path, on_scene=on_scene)
+
+        def done(status, payload):
+            if status == "done":
+                self._show_process_result(*payload)
+            elif status == "cancelled":
+                self.status_text.insert(tk.END, "Processing cancelled, nothing was added.\n")
+            else:
+                messagebox.showerror("Error", f"Error processing file: {str(payload)}")
+
+        self.tasks.start("Processing...", work, done)
 
     def _perform_search(self):
         search_value = self.search_entry.get()
         if not search_value:
             messagebox.showerror("Error", "Please enter a search term")
             return
-            
-        try:
-            self.lookup(self.search_type.get(), search_value)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error performing search: {str(e)}")
+        if self._is_busy():
+            return
+
+        search_type = self.search_type.get()
+        # Typos are only allowed in a single artist/location name
+        fuzzy = self.fuzzy_var.get() and search_type != "query"
+        conditions = None
+        if search_type == "query":
+            try:
+                conditions = parse_query(search_value)
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid query: {e}")
+                return
+            search_value = format_query(conditions)
+
+        def work(task):
+            if conditions is not None:
+                # Planned on the search index, most selective condition first
+                return self.data_cache.query(conditions, task.check_cancelled)[0]
+            if fuzzy:
+                return self.data_cache.fuzzy_search(search_type, search_value)
+            return self._search_results(search_type, search_value, task)
+
+        def done(status, payload):
+            if status == "done" and fuzzy:
+                self._show_results(flatten_ranked(payload), search_type, search_value.lower(), ranked=payload)
+            elif status == "done":
+                self._show_results(payload, search_type, search_value.lower())
+            elif status == "error":
+                messagebox.showerror("Error", f"Error performing search: {str(payload)}")
+
+        self.tasks.start("Searching...", work, done)
 
 def main():
+    # --profile turns the phase timings on from the start; --profile-out also runs the window
+    # under cProfile (that only sees the tk thread, background tasks show in the Stats window)
+    parser = argparse.ArgumentParser(description="Script Manager GUI.")
+    parser.add_argument('--profile', action='store_true', help="Record phase timings from the start.")
+    parser.add_argument('--profile-out', type=str, default=None, help="Write cProfile stats to this .prof file on exit.")
+    args = parser.parse_args()
+    profiling.enable(args.profile or bool(args.profile_out))
+
     root = tk.Tk()
     app = ScriptManagerGUI(root)
-    root.mainloop()
+    if args.profile_out:
+        profiling.profile_call(args.profile_out, root.mainloop)
+    else:
+        root.mainloop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
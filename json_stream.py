@@ -0,0 +1,99 @@
+import json
+import os
+import re
+
+'''
+incremental reader for the top-level array in data.json. the file is read in chunks and each
+element is decoded with JSONDecoder.raw_decode as soon as it is complete in the buffer, so
+a caller walking the episodes holds one of them (plus a chunk) at a time instead of the
+whole database, and gets the first episode before the rest of the file has been read.
+'''
+
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_START = "-0123456789"
+_AFTER_VALUE = " \t\n\r,]"
+
+
+def iter_json_array(source, chunk_size: int = CHUNK_SIZE, object_hook=None):
+    """
+    Yields the elements of the json array in `source` (a path, or an open text file) one at a time.
+    A file that isn't a well-formed array raises json.JSONDecodeError once the reader gets to
+    the bad part, including anything but whitespace after the closing "]"; the elements
+    before it have been yielded by then.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from _iter_array(f, chunk_size, object_hook)
+    else:
+        yield from _iter_array(source, chunk_size, object_hook)
+
+
+def _iter_array(f, chunk_size: int, object_hook):
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    buffer, pos, eof = "", 0, False
+    # Leading whitespace can be longer than a chunk
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer) or eof:
+            break
+        more = f.read(chunk_size)
+        eof = not more
+        buffer, pos = buffer[pos:] + more, 0
+    if not buffer.startswith("[", pos):
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+    expect_value = None  # None: right after "[", True: after ",", False: after a value
+    read_size = chunk_size
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer) and not eof:
+            more = f.read(read_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        if expect_value is False:
+            if buffer.startswith("]", pos):
+                return _expect_end(f, buffer, pos + 1, chunk_size)
+            if not buffer.startswith(",", pos):
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+        if expect_value is None and buffer.startswith("]", pos):
+            return _expect_end(f, buffer, pos + 1, chunk_size)
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # A number cut off by the chunk ("3" of "3.5") still decodes, so it only counts once what follows it is in
+            complete = eof or (end < len(buffer) and (buffer[pos] not in _NUMBER_START or buffer[end] in _AFTER_VALUE))
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # Element not all in the buffer yet; read ahead, twice as much each time it still isn't
+            more = f.read(read_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            read_size *= 2
+            continue
+
+        yield value
+        pos = end
+        expect_value = False
+        read_size = chunk_size
+
+
+def _expect_end(f, buffer: str, pos: int, chunk_size: int) -> None:
+    # Only whitespace may follow the closing "]", to the end of the file
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer):
+            raise json.JSONDecodeError("Extra data", buffer, pos)
+        buffer, pos = f.read(chunk_size), 0
+        if not buffer:
+            return
@@ -0,0 +1,154 @@
+import json
+import os
+
+from atomic_file import atomic_write
+
+'''
+append-only episode log (data.jsonl): one episode per line, newest record wins.
+adding an episode appends one line instead of re-serialising the whole database,
+and load_jsonl rebuilds the same list of episodes that data.json holds.
+'''
+
+# Every record is written by json.dumps with the default separators and
+# "episode" as its first key, so the name sits right after this prefix.
+NAME_PREFIX = '{"episode": '
+
+_decoder = json.JSONDecoder()
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith(".jsonl")
+
+
+def _iter_records(path: str):
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from an interrupted append; everything before it is fine,
+                # and the next append cuts it off (_end_last_line)
+                continue
+
+
+def load_jsonl(path: str) -> list:
+    """
+    Rebuilds the list of episodes from the log.
+    A later record for an episode replaces the earlier one, keeping the earlier position.
+    """
+    episodes = {}
+    for record in _iter_records(path):
+        episodes[record["episode"]] = record
+    return list(episodes.values())
+
+
+def _record_name(line: str) -> str:
+    if line.startswith(NAME_PREFIX):
+        try:
+            return _decoder.raw_decode(line, len(NAME_PREFIX))[0]
+        except json.JSONDecodeError:
+            pass
+    return json.loads(line)["episode"]
+
+
+def jsonl_episode_names(path: str) -> list:
+    """Episode names in log order, read without decoding the scenes."""
+    names = {}
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                if line.endswith("\n"):
+                    # The newline is the last thing an append writes, so the record is whole
+                    names[_record_name(line)] = None
+                else:
+                    # An unterminated last line only counts if it is a whole record (load_jsonl's rule)
+                    names[json.loads(line)["episode"]] = None
+            except json.JSONDecodeError:
+                continue
+    return list(names)
+
+
+def _end_last_line(path: str) -> None:
+    """
+    Makes sure the log ends in a newline before an append. An unterminated last line that is a
+    whole record gets its newline; a torn one (an interrupted append) is cut off, so the next
+    record doesn't get glued onto it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Find the start of the last line
+        start = size
+        while start > 0:
+            step = min(65536, start)
+            f.seek(start - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                start = start - step + newline + 1
+                break
+            start -= step
+        f.seek(start)
+        try:
+            json.loads(f.read().decode("utf-8"))["episode"]
+        except (ValueError, KeyError, TypeError):
+            f.truncate(start)
+        else:
+            f.write(b"\n")
+
+
+def _record(episode: dict) -> str:
+    return json.dumps(episode, ensure_ascii=False) + "\n"
+
+
+def append_jsonl(path: str, episodes: list) -> None:
+    """Appends finished episodes to the log, one line each."""
+    _end_last_line(path)
+    with open(path, "a", encoding="utf-8") as f:
+        for episode in episodes:
+            f.write(_record(episode))
+
+
+def append_jsonl_stream(path: str, name: str, scenes) -> None:
+    """
+    Appends one episode whose scenes come from an iterator, writing them as they arrive.
+    If the iterator fails, the log is cut back to where it was, so no partial line is left.
+    """
+    _end_last_line(path)
+    with open(path, "a+", encoding="utf-8") as f:
+        f.seek(0, os.SEEK_END)
+        start = f.tell()
+        try:
+            f.write(f"{NAME_PREFIX}{json.dumps(name, ensure_ascii=False)}, \"scenes\": [")
+            first = True
+            for scene in scenes:
+                if not first:
+                    f.write(", ")
+                f.write(json.dumps(scene, ensure_ascii=False))
+                first = False
+            f.write("]}\n")
+        except BaseException:
+            f.flush()
+            f.truncate(start)
+            raise
+
+
+def write_jsonl(path: str, episodes: list) -> None:
+    """Rewrites the whole log (one line per episode), e.g. to compact away old records."""
+    with atomic_write(path, encoding="utf-8") as f:
+        for episode in episodes:
+            f.write(_record(episode))
+
@@ -0,0 +1,162 @@
+import http.client
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from compact_model import json_default
+from query import Condition, PlanStep, format_query, parse_query
+from search_results import Match, find_matches
+from sqlite_store import is_sqlite
+from storage import DataCache
+
+'''
+local lookup daemon. `main.py serve` loads the database and its search index once and answers
+artist/location queries over http on 127.0.0.1; `main.py lookup` asks it first and only loads
+the data itself when no daemon is listening. the daemon keeps a DataCache, so episodes added
+from another process are picked up on the next query (the file's size/mtime changes).
+
+GET /lookup?type=artist&value=john&data=/abs/path/data.json
+    -> {"matches": [[episode, scene, artist, others], ...]}
+GET /fuzzy?type=artist&value=jhon&data=/abs/path/data.json[&max_distance=2]
+    -> {"ranked": [[value, distance, [[episode, scene, artist, others], ...]], ...]}
+GET /query?q=artist:john+tod:night&data=/abs/path/data.json
+    -> {"matches": [...], "plan": [[field, value, estimate, remaining], ...]}
+GET /ping -> {"data": "/abs/path/data.json"}, the database being served
+a request for a different database than the one being served gets 409, and the client falls back.
+'''
+
+DEFAULT_PORT = 8765
+HOST = "127.0.0.1"
+
+# Long enough for a huge result set; a missing daemon is refused straight away
+CLIENT_TIMEOUT = 30
+
+# A daemon answers /ping at once; anything slower (a hung daemon, some other server on the port)
+# is given up on quickly, so a one-off lookup never waits CLIENT_TIMEOUT before loading the data itself
+PROBE_TIMEOUT = 0.5
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/ping":
+            return self._reply(200, {"data": self.server.data_path})
+        if url.path not in ("/lookup", "/fuzzy", "/query"):
+            return self._reply(404, {"error": "unknown path"})
+        if query.get("data") != self.server.data_path:
+            return self._reply(409, {"error": f"serving {self.server.data_path}"})
+        if url.path == "/query":
+            return self._query(query.get("q", ""))
+        if query.get("type") not in ("artist", "location") or "value" not in query:
+            return self._reply(400, {"error": "type must be artist or location, and value is required"})
+
+        try:
+            if url.path == "/fuzzy":
+                max_distance = int(query["max_distance"]) if "max_distance" in query else None
+                ranked = self.server.cache.fuzzy_search(query["type"], query["value"], max_distance)
+                return self._reply(200, {"ranked": [[value, distance, [list(match) for match in matches]]
+                                                    for value, distance, matches in ranked]})
+            data = self.server.cache.search(query["type"], query["value"])
+            matches = find_matches(data, query["type"], query["value"])
+        except Exception as e:
+            return self._reply(500, {"error": str(e)})
+        self._reply(200, {"matches": [list(match) for match in matches]})
+
+    def _query(self, text: str) -> None:
+        try:
+            conditions = parse_query(text)
+        except ValueError as e:
+            return self._reply(400, {"error": str(e)})
+        try:
+            matches, steps = self.server.cache.query(conditions)
+        except Exception as e:
+            return self._reply(500, {"error": str(e)})
+        self._reply(200, {"matches": [list(match) for match in matches],
+                          "plan": [[*condition, estimate, remaining] for condition, estimate, remaining in steps]})
+
+    def _reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body, ensure_ascii=False, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Keep the daemon's console quiet; scripts may call it hundreds of times an hour
+        pass
+
+
+def make_server(json_file: str, port: int = DEFAULT_PORT) -> HTTPServer:
+    server = HTTPServer((HOST, port), LookupHandler)
+    server.data_path = os.path.abspath(json_file)
+    server.cache = DataCache(json_file)
+    return server
+
+
+def serve(json_file: str, port: int = DEFAULT_PORT) -> None:
+    server = make_server(json_file, port)
+    if not is_sqlite(json_file):
+        # Load the data and index now rather than on the first query
+        server.cache.index()
+    print(f"Serving lookups for '{json_file}' on http://{HOST}:{port} (Ctrl+C to stop).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _request(path: str, params: dict, port: int, timeout: float):
+    conn = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    try:
+        conn.request("GET", f"{path}?{urlencode(params)}")
+        response = conn.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read().decode("utf-8"))
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def _get(path: str, params: dict, port: int):
+    # The daemon's json reply, or None if it isn't running, serves another database or failed
+    probe = _request("/ping", {}, port, PROBE_TIMEOUT)
+    if not isinstance(probe, dict) or probe.get("data") != params["data"]:
+        return None
+    return _request(path, params, port, CLIENT_TIMEOUT)
+
+
+def query_server(json_file: str, search_type: str, search_value: str, port: int = DEFAULT_PORT):
+    """Match records from a running daemon, or None if there is none for this database."""
+    body = _get("/lookup", {"type": search_type, "value": search_value, "data": os.path.abspath(json_file)}, port)
+    if body is None:
+        return None
+    return [Match(*record) for record in body["matches"]]
+
+
+def query_server_fuzzy(json_file: str, search_type: str, search_value: str, max_distance: int = None,
+                       port: int = DEFAULT_PORT):
+    """A fuzzy lookup (storage.ranked_matches) from a running daemon, or None if there is none for this database."""
+    params = {"type": search_type, "value": search_value, "data": os.path.abspath(json_file)}
+    if max_distance is not None:
+        params["max_distance"] = max_distance
+    body = _get("/fuzzy", params, port)
+    if body is None:
+        return None
+    return [(value, distance, [Match(*record) for record in records]) for value, distance, records in body["ranked"]]
+
+
+def query_server_compound(json_file: str, conditions: list, port: int = DEFAULT_PORT):
+    """A compound query (storage.query_data) from a running daemon, or None if there is none for this database."""
+    body = _get("/query", {"q": format_query(conditions), "data": os.path.abspath(json_file)}, port)
+    if body is None:
+        return None
+    return ([Match(*record) for record in body["matches"]],
+            [PlanStep(Condition(field, value), estimate, remaining) for field, value, estimate, remaining in body["plan"]])
@@ -1,8 +1,16 @@
-import re
-import json
-import os
 import sys
 import argparse
+import glob
+import json
+
+from formatting import export_markdown
+from lookup_server import DEFAULT_PORT, query_server, query_server_compound, query_server_fuzzy, serve
+import profiling
+from query import QUERY_FIELDS, Condition, describe_plan, format_query, parse_query
+from repl import run_shell
+from search_results import iter_text_blocks, render_ranked
+from storage import (add_episode, add_episodes, default_data_file, fuzzy_search_data, list_episodes, lookup_matches,
+                     migrate_data, query_data, stream_episodes, sync_directory)
 
 '''
 hey dev here. this was the initial version of the script. as you can see, it's a bit messy and not very user-friendly. but it works! and fully functional.
@@ -12,209 +20,250 @@ but most of the futhur improvements are made in the next versions (GUI VERSIONS)
 # Configure output encoding
 sys.stdout.reconfigure(encoding='utf-8')
 
-def process_fountain_file(input_file: str, json_file: str = "data.json") -> None:
+def process_fountain_file(input_file: str, json_file: str = "data.json", use_mmap: bool = False) -> None:
     """
     Parses a Fountain script file and appends its data to a JSON file.
     Now includes synopsis tracking for scenes.
     """
-    # Constants
-    SCENE_PATTERN = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s.+$"
-    CONTENT_PATTERN = r"\["
-    SYNOPSIS_PATTERN = r"^=\s+(.+)$"
-
-    # Initialize data structure
-    file_name = os.path.basename(input_file).split('.')[0]
-    new_data = {
-        "episode": file_name,
-        "scenes": []
-    }
-
-    # Load existing data
-    if os.path.exists(json_file):
-        with open(json_file, "r", encoding="utf-8") as f:
-            try:
-                existing_data = json.load(f)
-            except json.JSONDecodeError:
-                existing_data = []
-    else:
-        existing_data = []
-
-    # Check if file already processed
-    if any(entry["episode"] == file_name for entry in existing_data):
+    # Stream the scenes straight into the JSON file
+    file_name, added = add_episode(input_file, json_file, use_mmap)
+    if not added:
         print(f"File '{file_name}' is already in the JSON file. Skipping.")
         return
 
-    def parse_scene_heading(line: str) -> dict | None:
-        pattern = r"^(EXT\.|INT\.|EXT/INT\.|INT/EXT\.)\s(.+?)\s-\s(.+?)\s(#\d+#)$"
-        match = re.match(pattern, line)
-        if match:
-            return {
-                "setting": match.group(1),
-                "location": match.group(2),
-                "TOD": match.group(3),
-                "identifier": match.group(4),
-            }
-        return None
-
-    def parse_content_line(line: str) -> list | None:
-        line = line.replace('[', '').replace(']', '')
-        result = line.split(',')
-        return result if result else None
-
-    # Read and parse the Fountain file
-    with open(input_file, "r", encoding="utf-8") as f:
-        content = f.read().splitlines()
-
-    current_scene = None
-    scene_count = 0
-    current_synopsis = ""
-
-    for line in content:
-        # Check for synopsis
-        synopsis_match = re.match(SYNOPSIS_PATTERN, line)
-        if synopsis_match:
-            current_synopsis = synopsis_match.group(1).strip()
-            continue
-
-        # Match scene headings
-        if re.match(SCENE_PATTERN, line):
-            scene_count += 1
-            scene_data = parse_scene_heading(line)
-            if scene_data:
-                current_scene = {
-                    "scene_number": scene_count,
-                    "scene_heading": line,
-                    "synopsis": current_synopsis,  # Add synopsis to scene data
-                    "setting": scene_data["setting"],
-                    "location": scene_data["location"],
-                    "TOD": scene_data["TOD"],
-                    "artists": []
-                }
-                new_data["scenes"].append(current_scene)
-                current_synopsis = ""  # Reset synopsis for next scene
-
-        # Match content lines
-        elif re.match(CONTENT_PATTERN, line) and current_scene:
-            result = parse_content_line(line)
-            if result:
-                artist = result[0].strip()
-                costume = result[1].strip()
-                props = result[2].strip() if len(result) > 2 else ""
-                current_scene["artists"].append({
-                    "artist": artist,
-                    "costume": costume,
-                    "props": props
-                })
-
-    # Append new data
-    existing_data.append(new_data)
-
-    # Save updated data
-    with open(json_file, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=4)
-
     print(f"Data from '{file_name}' successfully added to '{json_file}'.")
 
-def lookup(json_file: str, search_type: str, search_value: str) -> None:
+def lookup(json_file: str, search_type: str, search_value: str, port: int = None) -> None:
     """
     Enhanced search function that includes episode grouping and synopsis display.
+    With a port, a running `serve` daemon answers first; without one the data is read here,
+    and a data.json is streamed so each episode's results are printed as soon as it has been read.
+    """
+    matches = query_server(json_file, search_type, search_value, port) if port else None
+    if matches is None:
+        matches = lookup_matches(json_file, search_type, search_value)
+
+    # Episodes are printed as ep<name>
+    blocks = iter_text_blocks(matches, search_type, search_value, episode_prefix="ep")
+    try:
+        for block in profiling.timed_iter("result rendering", blocks):
+            print("\n".join(block))
+    except json.JSONDecodeError as e:
+        # data.json is read while the results are printed; the ones above are only part of them
+        sys.exit(f"Error: '{json_file}' is not valid JSON ({e.msg}); the results above are incomplete.")
+
+def fuzzy_lookup(json_file: str, search_type: str, search_value: str, max_distance: int = None, port: int = None) -> None:
+    """
+    Lookup that tolerates misspelled names: lists the closest artist names/locations by edit
+    distance, then the scenes of each. A running `serve` daemon answers first, as for lookup.
     """
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    search_value = search_value.lower()
-    print("-" * 75)
-    print(f"Search Results for {search_type.title()}: {search_value}")
-
-    if search_type == "artist":
-        # Group results by episode
-        for entry in data:
-            episode_printed = False
-            for scene in entry["scenes"]:
-                # Check if the searched artist is in this scene
-                searched_artist = None
-                other_artists = []
-                
-                for artist in scene["artists"]:
-                    if search_value in artist["artist"].lower():
-                        searched_artist = artist
-                    else:
-                        other_artists.append(artist)
-                
-                if searched_artist:
-                    if not episode_printed:
-                        print(f"|_ep{entry['episode']}")
-                        episode_printed = True
-                    
-                    # Print synopsis if available
-                    print(f"    |_synopsis : {scene.get('synopsis', '')}")
-                    print(f"    |_scene {scene['scene_number']} : {scene['setting']}, {scene['TOD']}")
-                    print(f"        |_location : {scene['location']}")
-                    print(f"            |_artist_name : {searched_artist['artist']}")
-                    print(f"                |_costume : {searched_artist['costume']}")
-                    print(f"                |_props : {searched_artist['props']}")
-                    
-                    # Print other artists
-                    for idx, artist in enumerate(other_artists, 1):
-                        print(f"     ")
-                        print(f"            |_other_artist_{idx} : {artist['artist']}")
-                        print(f"                |_costume : {artist['costume']}")
-                        print(f"                |_props : {artist['props']}")
-                    print()
-
-    elif search_type == "location":
-        # Group results by episode
-        for entry in data:
-            episode_printed = False
-            for scene in entry["scenes"]:
-                if search_value in scene["location"].lower():
-                    if not episode_printed:
-                        print(f"|_ep{entry['episode']}")
-                        episode_printed = True
-                    
-                    # Print synopsis if available
-                    print(f"    |_synopsis : {scene.get('synopsis', '')}")
-                    print(f"    |_scene {scene['scene_number']} : {scene['setting']}, {scene['TOD']}")
-                    for idx, artist in enumerate(scene["artists"], 1):
-                        print(f"            |_artist_{idx} : {artist['artist']}")
-                        print(f"                |_costume : {artist['costume']}")
-                        print(f"                |_props : {artist['props']}")
-                        if idx < len(scene["artists"]):
-                            print("     ")
-                    print()
-    
-    print("-" * 75)
-
-def add_episode_from_file(input_file: str, json_file: str = "data.json") -> None:
-    process_fountain_file(input_file, json_file)
-
-def search_episode_data(json_file: str, search_type: str, search_value: str) -> None:
-    lookup(json_file, search_type, search_value)
+    ranked = query_server_fuzzy(json_file, search_type, search_value, max_distance, port) if port else None
+    if ranked is None:
+        ranked = fuzzy_search_data(json_file, search_type, search_value, max_distance)
+    print("\n".join(render_ranked(ranked, search_type, search_value, episode_prefix="ep")))
+
+def query_lookup(json_file: str, conditions: list, port: int = None, explain: bool = False) -> None:
+    """
+    Lookup on several fields at once (query.py), e.g. artist:rahim location:kitchen tod:night.
+    The search index plans it, most selective condition first; explain prints that plan too.
+    A running `serve` daemon answers first, as for lookup.
+    """
+    result = query_server_compound(json_file, conditions, port) if port else None
+    matches, steps = result if result is not None else query_data(json_file, conditions)
+    if explain:
+        print("\n".join(describe_plan(steps)))
+
+    blocks = iter_text_blocks(matches, "query", format_query(conditions), episode_prefix="ep")
+    for block in profiling.timed_iter("result rendering", blocks):
+        print("\n".join(block))
+
+def add_episode_from_file(input_file: str, json_file: str = "data.json", use_mmap: bool = False) -> None:
+    process_fountain_file(input_file, json_file, use_mmap)
+
+def add_episodes_from_files(patterns: list, json_file: str = "data.json", workers: int = None, use_mmap: bool = False) -> None:
+    """
+    Batch version of addEpisode: takes files or glob patterns, parses them in parallel
+    and writes the JSON file once at the end.
+    """
+    input_files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        input_files.extend(matches if matches else [pattern])
+
+    report = add_episodes(input_files, json_file, workers, use_mmap)
+
+    for name in report["skipped"]:
+        print(f"File '{name}' is already in the JSON file. Skipping.")
+    for path, error in report["errors"]:
+        print(f"Error processing '{path}': {error}")
+    print(f"{len(report['added'])} episode(s) added to '{json_file}', "
+          f"{len(report['skipped'])} skipped, {len(report['errors'])} failed.")
+
+def sync_scripts(script_dir: str, json_file: str = "data.json", workers: int = None, use_mmap: bool = False) -> None:
+    """Reparses only the new or changed .fountain files in a directory."""
+    report = sync_directory(script_dir, json_file, workers, use_mmap)
+
+    for name in report["added"]:
+        print(f"Added '{name}'.")
+    for name in report["updated"]:
+        print(f"Updated '{name}'.")
+    for path in report["removed"]:
+        print(f"'{path}' no longer exists (its episode is kept).")
+    for path, error in report["errors"]:
+        print(f"Error processing '{path}': {error}")
+    print(f"{len(report['added'])} added, {len(report['updated'])} updated, "
+          f"{report['unchanged']} unchanged, {len(report['errors'])} failed.")
+
+def search_episode_data(json_file: str, search_type: str, search_value: str, port: int = None,
+                        fuzzy: bool = False, max_distance: int = None) -> None:
+    if fuzzy or max_distance is not None:
+        fuzzy_lookup(json_file, search_type, search_value, max_distance, port)
+    else:
+        lookup(json_file, search_type, search_value, port)
+
+def serve_lookups(json_file: str, port: int = DEFAULT_PORT) -> None:
+    """Keeps the database and its index loaded and answers lookups on localhost."""
+    serve(json_file, port)
+
+def migrate_database(source: str, target: str) -> None:
+    """One-time move of the database to another backend (data.jsonl log, data.db sqlite or data.shards)."""
+    count = migrate_data(source, target)
+    print(f"Migrated {count} episode(s) from '{source}' to '{target}'.")
+
+def show_episodes(json_file: str) -> None:
+    """Prints every episode with its scene count (a .shards store only reads its manifest)."""
+    episodes = list_episodes(json_file)
+    for name, scene_count in episodes:
+        print(f"{name} ({scene_count} scenes)")
+    print(f"{len(episodes)} episode(s) in '{json_file}'.")
+
+def export_formatted(json_file: str, output_file: str) -> None:
+    """Writes the whole database in the GUI's Format markdown layout to a file, reading one episode at a time."""
+    try:
+        count = export_markdown(stream_episodes(json_file), output_file)
+    except json.JSONDecodeError as e:
+        # export_markdown leaves no partial file behind
+        sys.exit(f"Error: '{json_file}' is not valid JSON ({e.msg}); nothing was exported.")
+    print(f"Exported {count} episode(s) to '{output_file}'.")
 
 def main():
     parser = argparse.ArgumentParser(description="Script for managing Fountain script data.")
+    parser.add_argument('--data', type=str, default=default_data_file(),
+                        help="Database file; a .jsonl path uses the append-only log, a .shards path one file per episode "
+                             "(default: data.db, data.shards or data.jsonl if present, else data.json).")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print how long each phase (load, parse, dump, search, render, ...) took.")
+    parser.add_argument('--profile-out', type=str, default=None,
+                        help="Also run under cProfile and write the stats to this .prof file.")
     subparsers = parser.add_subparsers(dest='command')
 
     # Add episode subcommand
     add_episode_parser = subparsers.add_parser('addEpisode', help="Add an episode from a Fountain file.")
     add_episode_parser.add_argument('filepath', type=str, help="Path to the Fountain file to add.")
+    add_episode_parser.add_argument('--mmap', action='store_true', help="Use the mmap parser (for very large files).")
+
+    # Batch add subcommand
+    add_episodes_parser = subparsers.add_parser('addEpisodes', help="Add many episodes at once (files or glob patterns).")
+    add_episodes_parser.add_argument('filepaths', type=str, nargs='+', help="Fountain files or glob patterns, e.g. \"season2/*.fountain\".")
+    add_episodes_parser.add_argument('--workers', type=int, default=None, help="Number of parser processes (default: one per CPU).")
+    add_episodes_parser.add_argument('--mmap', action='store_true', help="Use the mmap parser (for very large files).")
+
+    # Sync subcommand
+    sync_parser = subparsers.add_parser('sync', help="Add new and re-read changed Fountain files from a directory.")
+    sync_parser.add_argument('directory', type=str, help="Directory containing .fountain files.")
+    sync_parser.add_argument('--workers', type=int, default=None, help="Number of parser processes (default: one per CPU).")
+    sync_parser.add_argument('--mmap', action='store_true', help="Use the mmap parser (for very large files).")
 
     # Lookup subcommand
-    lookup_parser = subparsers.add_parser('lookup', help="Search for artist or location.")
+    lookup_parser = subparsers.add_parser('lookup', help="Search by artist, location or several fields at once.")
     lookup_parser.add_argument('--location', type=str, help="Location name to search.")
     lookup_parser.add_argument('--artist', type=str, help="Artist name to search.")
+    lookup_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port of a running `serve` daemon to ask first.")
+    lookup_parser.add_argument('--no-daemon', action='store_true', help="Always load the data directly.")
+    lookup_parser.add_argument('--fuzzy', action='store_true', help="Also match misspellings; results are ranked by edit distance.")
+    lookup_parser.add_argument('--max-distance', type=int, choices=[0, 1, 2], default=None,
+                               help="Edits allowed per word with --fuzzy (default: 1 for words up to 5 letters, else 2).")
+    lookup_parser.add_argument('--setting', type=str, help="Setting to match (INT., EXT., ...).")
+    lookup_parser.add_argument('--tod', type=str, help="Time of day to match (DAY, NIGHT, ...).")
+    lookup_parser.add_argument('--costume', type=str, help="Costume worn by someone in the scene.")
+    lookup_parser.add_argument('--props', type=str, help="Props carried by someone in the scene.")
+    lookup_parser.add_argument('--episode', type=str, help="Episode name to match.")
+    lookup_parser.add_argument('--query', type=str,
+                               help="Several fields at once, e.g. \"artist:rahim location:kitchen tod:night props:knife\".")
+    lookup_parser.add_argument('--explain', action='store_true', help="Print how a multi-field lookup was planned.")
+
+    # Serve subcommand
+    serve_parser = subparsers.add_parser('serve', help="Keep the data loaded and answer lookups on localhost.")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on (127.0.0.1 only).")
+
+    # Migrate subcommand
+    migrate_parser = subparsers.add_parser('migrate', help="Copy the database to another backend (.jsonl log, .db sqlite or .shards directory).")
+    migrate_parser.add_argument('--source', type=str, default="data.json", help="Database to read.")
+    migrate_parser.add_argument('--target', type=str, default="data.jsonl", help="Database to write; the extension picks the backend.")
+
+    # Interactive shell subcommand
+    subparsers.add_parser('shell', help="Load the data once and run artist/location/add/export commands interactively.")
+
+    # Episode listing subcommand
+    subparsers.add_parser('listEpisodes', help="List the episodes in the database with their scene counts.")
+
+    # Markdown export subcommand
+    export_md_parser = subparsers.add_parser('exportMd', help="Write every episode as a markdown scene checklist.")
+    export_md_parser.add_argument('output', type=str, nargs='?', default="formatted_script.md", help="Markdown file to write.")
 
     args = parser.parse_args()
 
+    if not (args.profile or args.profile_out):
+        run_command(parser, args)
+        return
+
+    profiling.enable()
+    try:
+        if args.profile_out:
+            profiling.profile_call(args.profile_out, run_command, parser, args)
+        else:
+            run_command(parser, args)
+    finally:
+        print(profiling.format_report(), file=sys.stderr)
+        if args.profile_out:
+            print(f"cProfile stats written to '{args.profile_out}'.", file=sys.stderr)
+
+def run_command(parser, args) -> None:
     if args.command == 'addEpisode':
-        add_episode_from_file(args.filepath)
+        add_episode_from_file(args.filepath, args.data, use_mmap=args.mmap)
+    elif args.command == 'addEpisodes':
+        add_episodes_from_files(args.filepaths, args.data, workers=args.workers, use_mmap=args.mmap)
+    elif args.command == 'sync':
+        sync_scripts(args.directory, args.data, workers=args.workers, use_mmap=args.mmap)
     elif args.command == 'lookup':
-        if args.location:
-            search_episode_data("data.json", "location", args.location)
-        elif args.artist:
-            search_episode_data("data.json", "artist", args.artist)
+        # A profiled lookup runs here, so its phases are the ones measured
+        port = None if args.no_daemon or profiling.enabled else args.port
+        try:
+            conditions = parse_query(args.query) if args.query else []
+        except ValueError as e:
+            print(f"Invalid query: {e}")
+            return
+        conditions += [Condition(field, getattr(args, field).lower()) for field in QUERY_FIELDS if getattr(args, field)]
+
+        if not conditions:
+            print("Please specify --location, --artist or another field (or a --query) for lookup.")
+        elif len(conditions) == 1 and not args.query and conditions[0].field in ("artist", "location"):
+            search_type = conditions[0].field
+            search_episode_data(args.data, search_type, getattr(args, search_type), port, args.fuzzy, args.max_distance)
+        elif args.fuzzy or args.max_distance is not None:
+            print("--fuzzy only works with a single --artist or --location.")
         else:
-            print("Please specify either --location or --artist for lookup.")
+            query_lookup(args.data, conditions, port, args.explain)
+    elif args.command == 'migrate':
+        migrate_database(args.source, args.target)
+    elif args.command == 'serve':
+        serve_lookups(args.data, args.port)
+    elif args.command == 'shell':
+        run_shell(args.data)
+    elif args.command == 'listEpisodes':
+        show_episodes(args.data)
+    elif args.command == 'exportMd':
+        export_formatted(args.data, args.output)
     else:
         parser.print_help()
 
@@ -0,0 +1,130 @@
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+'''
+lightweight phase timings for the cli (--profile), the shell and the gui's stats window.
+code marks its phases (json load, file read, line parsing, duplicate check, json dump,
+search scan, result rendering, ...) and, while timing is switched on, every phase adds up
+its own time: a phase running inside another one (the file read inside the parse inside the
+dump of a streamed add) is taken out of the outer one, so the totals add up to the run.
+switched off (the default) a marked function costs one flag check.
+profile_call wraps a whole run in cProfile and dumps a .prof file for snakeviz/pstats.
+'''
+
+enabled = False
+
+_totals = {}             # phase -> [seconds, calls]
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(on: bool = True) -> None:
+    global enabled
+    enabled = on
+
+
+def reset() -> None:
+    with _lock:
+        _totals.clear()
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _enter(name: str) -> None:
+    _stack().append([name, time.perf_counter(), 0.0])
+
+
+def _exit() -> None:
+    stack = _stack()
+    name, start, inner = stack.pop()
+    elapsed = time.perf_counter() - start
+    if stack:
+        stack[-1][2] += elapsed
+    with _lock:
+        total = _totals.setdefault(name, [0.0, 0])
+        total[0] += elapsed - inner
+        total[1] += 1
+
+
+@contextmanager
+def phase(name: str):
+    if not enabled:
+        yield
+        return
+    _enter(name)
+    try:
+        yield
+    finally:
+        _exit()
+
+
+def timed(name: str):
+    """Decorator form of phase() for plain (non-generator) functions."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            _enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _exit()
+        return wrapper
+    return decorate
+
+
+def timed_iter(name: str, iterable):
+    """Counts the time spent producing each item of `iterable` towards `name`."""
+    if not enabled:
+        return iterable
+    return _timed_items(name, iter(iterable))
+
+
+def _timed_items(name: str, iterator):
+    while True:
+        _enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _exit()
+        yield item
+
+
+def report() -> list:
+    """(phase, seconds, calls), slowest first."""
+    with _lock:
+        rows = [(name, seconds, calls) for name, (seconds, calls) in _totals.items()]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def format_report() -> str:
+    rows = report()
+    if not rows:
+        return "No timings recorded."
+    total = sum(seconds for _, seconds, _ in rows)
+    lines = [f"{'phase':<20}{'seconds':>10}{'share':>8}{'calls':>10}"]
+    for name, seconds, calls in rows:
+        share = seconds / total * 100 if total else 0.0
+        lines.append(f"{name:<20}{seconds:>10.4f}{share:>7.1f}%{calls:>10}")
+    lines.append(f"{'total':<20}{total:>10.4f}")
+    return "\n".join(lines)
+
+
+def profile_call(prof_file: str, func, *args, **kwargs):
+    """Runs func under cProfile and writes the stats to prof_file."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(prof_file)
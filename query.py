@@ -0,0 +1,178 @@
+import re
+from collections import namedtuple
+
+from profiling import timed
+from search_index import ARTIST_FIELDS, SCENE_FIELDS
+from search_results import Match, split_artists
+
+'''
+compound queries: several conditions at once, e.g. scenes with rahim in the kitchen at night
+where someone carries a knife:
+
+    artist:rahim location:kitchen tod:night props:knife
+
+every condition is a case-insensitive substring test, like lookup's, and a scene has to pass
+all of them. artist, costume and props are tested against each of the scene's artists (not
+necessarily the same one), episode against the episode name. a value runs up to the next
+field:, or can be quoted: artist:"rahim hossain".
+plan_query works out the candidate scenes from the search index before anything is read:
+episode names first, then the field conditions from the fewest postings to the most, each one
+only looking at the episodes still left. find_query_matches then tests the scenes that are
+left against every condition, so the index only ever decides what gets checked.
+'''
+
+QUERY_FIELDS = ("artist", "location", "setting", "tod", "costume", "props", "episode")
+
+# Once this many times more postings than candidate scenes are left to intersect,
+# testing the candidates directly is cheaper (the final check tests every condition anyway)
+CHECK_RATIO = 16
+
+Condition = namedtuple("Condition", ["field", "value"])
+
+# condition: the field condition; estimate: postings (episodes for an episode condition) it
+# matches on its own; remaining: candidates left after it, None if it was left to the final check
+PlanStep = namedtuple("PlanStep", ["condition", "estimate", "remaining"])
+
+_TERM = re.compile(r'\s*(\w+):\s*(?:"([^"]*)"|(.*?))\s*(?=\s\w+:|$)')
+
+
+def parse_query(text: str) -> list:
+    """Conditions of a query like 'artist:rahim tod:night' (values lowercased). Raises ValueError if it doesn't parse."""
+    conditions = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TERM.match(text, pos)
+        if not match:
+            raise ValueError(f"expected field:value at '{text[pos:]}'")
+        field = match.group(1).lower()
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"unknown field '{field}' (use {', '.join(QUERY_FIELDS)})")
+        if not value.strip():
+            raise ValueError(f"no value given for {field}")
+        conditions.append(Condition(field, value.strip().lower()))
+        pos = match.end()
+    if not conditions:
+        raise ValueError("empty query")
+    return conditions
+
+
+def format_query(conditions: list) -> str:
+    """The query text for `conditions`; parse_query reads it back to the same conditions."""
+    return " ".join(f'{field}:"{value}"' if ":" in value else f"{field}:{value}" for field, value in conditions)
+
+
+def plan_query(index, conditions: list) -> tuple:
+    """
+    (candidates, steps) for a query. candidates is {episode index: set of scene indexes, or None
+    for all of its scenes}, a superset of the matching scenes; steps are the PlanSteps in the order
+    they were applied.
+    """
+    steps = []
+    candidates = None
+    for condition in conditions:
+        if condition.field == "episode":
+            found = {ep_idx for ep_idx, name in enumerate(index.episodes) if condition.value in name.lower()}
+            candidates = {ep_idx: None for ep_idx in found if candidates is None or ep_idx in candidates}
+            steps.append(PlanStep(condition, len(found), len(candidates)))
+
+    ordered = []
+    for condition in conditions:
+        if condition.field != "episode":
+            field_index = index.fields[condition.field]
+            postings = [field_index.postings[value] for value in field_index.matching_values(condition.value)]
+            ordered.append((sum(len(scene_idxs) for posting in postings for scene_idxs in posting.values()),
+                            condition, postings))
+    ordered.sort(key=lambda item: item[0])
+
+    for estimate, condition, postings in ordered:
+        if candidates is not None and not candidates:
+            break
+        left = _count(candidates)
+        if left is not None and estimate > left * CHECK_RATIO:
+            steps.append(PlanStep(condition, estimate, None))
+            continue
+        candidates = _intersect(candidates, postings)
+        steps.append(PlanStep(condition, estimate, _count(candidates)))
+
+    if candidates is None:
+        # Only possible with no conditions at all
+        candidates = {ep_idx: None for ep_idx in range(len(index.episodes))}
+    return candidates, steps
+
+
+def _count(candidates):
+    # Candidate scenes so far; None while an episode is still wholly in (or nothing narrowed yet)
+    if candidates is None or any(scene_idxs is None for scene_idxs in candidates.values()):
+        return None
+    return sum(len(scene_idxs) for scene_idxs in candidates.values())
+
+
+def _intersect(candidates, postings: list) -> dict:
+    # The scenes of `candidates` (everything if None) that appear in one of the postings
+    found = {}
+    for posting in postings:
+        if candidates is None:
+            ep_idxs = posting
+        elif len(candidates) < len(posting):
+            ep_idxs = [ep_idx for ep_idx in candidates if ep_idx in posting]
+        else:
+            ep_idxs = [ep_idx for ep_idx in posting if ep_idx in candidates]
+        for ep_idx in ep_idxs:
+            found.setdefault(ep_idx, set()).update(posting[ep_idx])
+    if candidates is not None:
+        found = {ep_idx: scene_idxs if candidates[ep_idx] is None else scene_idxs & candidates[ep_idx]
+                 for ep_idx, scene_idxs in found.items()}
+        found = {ep_idx: scene_idxs for ep_idx, scene_idxs in found.items() if scene_idxs}
+    return found
+
+
+def describe_plan(steps: list) -> list:
+    """The plan as lines, for lookup --explain."""
+    lines = ["Query plan:"]
+    if not steps:
+        lines.append("    (sqlite planned this query itself)")
+    for condition, estimate, remaining in steps:
+        unit = "episode(s)" if condition.field == "episode" else "scene(s)"
+        term = format_query([condition])
+        if remaining is None:
+            lines.append(f"    {term} : {estimate} {unit} in the index, tested on the candidates instead")
+        else:
+            lines.append(f"    {term} : {estimate} {unit} in the index, {remaining} {unit} left")
+    return lines
+
+
+@timed("search scan")
+def find_query_matches(data, conditions: list, check=None) -> list:
+    """
+    The scenes of `data` that pass every condition, as search_results.Match records. With an
+    artist condition the match's artist is the last artist matching the first artist: condition,
+    as in an artist lookup (search_results.split_artists); otherwise the match lists every artist,
+    like a location lookup.
+    """
+    episode_terms = [value for field, value in conditions if field == "episode"]
+    artist_terms = [(field, value) for field, value in conditions if field in ARTIST_FIELDS]
+    scene_terms = [(SCENE_FIELDS[field], value) for field, value in conditions if field in SCENE_FIELDS]
+    searched_term = next((value for field, value in artist_terms if field == "artist"), None)
+
+    matches = []
+    for entry in data:
+        if check:
+            check()
+        episode = entry["episode"].lower()
+        if not all(value in episode for value in episode_terms):
+            continue
+        for scene in entry["scenes"]:
+            if not all(value in scene[key].lower() for key, value in scene_terms):
+                continue
+            artists = scene["artists"]
+            if not all(any(value in artist[field].lower() for artist in artists) for field, value in artist_terms):
+                continue
+
+            if searched_term is None:
+                matches.append(Match(entry["episode"], scene, None, artists))
+            else:
+                searched, others = split_artists(artists, searched_term)
+                matches.append(Match(entry["episode"], scene, searched, others))
+    return matches
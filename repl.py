@@ -0,0 +1,159 @@
+import cmd
+import os
+import time
+
+import profiling
+from formatting import export_markdown
+from query import describe_plan, format_query, parse_query
+from search_results import export_file_name, find_matches, flatten_ranked, render_markdown, render_ranked, render_text
+from sqlite_store import is_sqlite
+from storage import DataCache
+
+'''
+interactive shell for the cli (`main.py shell`). the database and its search index are loaded
+once into a DataCache and every command after that runs against the warm copy, reporting
+how long it took (and, with --profile, where the time went).
+episodes added from the shell go into the cache as well as the file.
+'''
+
+
+class ScriptShell(cmd.Cmd):
+    intro = "Script Manager shell. Type help or ? to list commands."
+    prompt = "script> "
+
+    def __init__(self, json_file: str):
+        super().__init__()
+        self.json_file = json_file
+        self.cache = DataCache(json_file)
+        self.last_matches = []
+        self.last_search = None  # (search type, search value) of the last lookup
+        self._started = None
+
+    def preloop(self):
+        start = time.perf_counter()
+        if not is_sqlite(self.json_file):
+            self.cache.index()
+        print(f"Loaded '{self.json_file}' in {time.perf_counter() - start:.3f}s.")
+
+    def precmd(self, line):
+        profiling.reset()
+        self._started = time.perf_counter()
+        return line
+
+    def postcmd(self, stop, line):
+        if line.strip() and not stop:
+            print(f"({time.perf_counter() - self._started:.3f}s)")
+            # With --profile, break the command down by phase
+            if profiling.enabled and profiling.report():
+                print(profiling.format_report())
+        return stop
+
+    def emptyline(self):
+        # Don't repeat the last command on a bare Enter
+        pass
+
+    def onecmd(self, line):
+        try:
+            return super().onecmd(line)
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+
+    def _lookup(self, search_type: str, search_value: str) -> None:
+        if not search_value:
+            print(f"Usage: {search_type} <name>")
+            return
+        data = self.cache.search(search_type, search_value)
+        self.last_matches = find_matches(data, search_type, search_value)
+        self.last_search = (search_type, search_value.lower())
+        print("\n".join(render_text(self.last_matches, search_type, search_value, episode_prefix="ep")))
+        print(f"{len(self.last_matches)} scene(s).")
+
+    def do_artist(self, arg):
+        """artist <name>: scenes with an artist whose name contains <name>"""
+        self._lookup("artist", arg.strip())
+
+    def do_location(self, arg):
+        """location <name>: scenes whose location contains <name>"""
+        self._lookup("location", arg.strip())
+
+    def do_fuzzy(self, arg):
+        """fuzzy artist|location <name>: closest names/locations to a possibly misspelled <name>, ranked"""
+        parts = arg.split(maxsplit=1)
+        if len(parts) < 2 or parts[0] not in ("artist", "location"):
+            print("Usage: fuzzy artist|location <name>")
+            return
+        search_type, search_value = parts[0], parts[1].strip()
+        ranked = self.cache.fuzzy_search(search_type, search_value)
+        self.last_matches = flatten_ranked(ranked)
+        self.last_search = (search_type, search_value.lower())
+        print("\n".join(render_ranked(ranked, search_type, search_value, episode_prefix="ep")))
+        print(f"{len(self.last_matches)} scene(s).")
+
+    def do_query(self, arg):
+        """query field:value ...: scenes matching every condition, e.g. query artist:rahim tod:night props:knife"""
+        if not arg.strip():
+            print("Usage: query artist:<name> location:<place> tod:<time> ...")
+            return
+        conditions = parse_query(arg)
+        self.last_matches, steps = self.cache.query(conditions)
+        self.last_search = ("query", format_query(conditions))
+        print("\n".join(render_text(self.last_matches, "query", self.last_search[1], episode_prefix="ep")))
+        if profiling.enabled:
+            print("\n".join(describe_plan(steps)))
+        print(f"{len(self.last_matches)} scene(s).")
+
+    def do_add(self, arg):
+        """add <file.fountain>: parse a Fountain file and add it as an episode"""
+        input_file = arg.strip()
+        if not os.path.exists(input_file):
+            print(f"File '{input_file}' not found.")
+            return
+        file_name, added = self.cache.add_episode(input_file)
+        if not added:
+            print(f"File '{file_name}' is already in the JSON file. Skipping.")
+        else:
+            print(f"Data from '{file_name}' successfully added to '{self.json_file}'.")
+
+    def do_export(self, arg):
+        """export md|txt [file]: save the results of the last artist/location/fuzzy search or query"""
+        parts = arg.split(maxsplit=1)
+        if not parts or parts[0] not in ("md", "txt"):
+            print("Usage: export md|txt [file]")
+            return
+        if self.last_search is None:
+            print("Nothing to export yet; run an artist, location or query search first.")
+            return
+
+        search_type, search_value = self.last_search
+        output_file = parts[1] if len(parts) > 1 else export_file_name(search_value, f".{parts[0]}")
+        if parts[0] == "md":
+            content = render_markdown(self.last_matches, search_type, search_value)
+        else:
+            content = "\n".join(render_text(self.last_matches, search_type, search_value))
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"Results saved to '{output_file}'.")
+
+    def do_format(self, arg):
+        """format [file]: write every episode as a markdown scene checklist (default formatted_script.md)"""
+        output_file = arg.strip() or "formatted_script.md"
+        count = export_markdown(self.cache.data(), output_file)
+        print(f"Exported {count} episode(s) to '{output_file}'.")
+
+    def do_quit(self, arg):
+        """quit: leave the shell"""
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg):
+        print()
+        return True
+
+
+def run_shell(json_file: str) -> None:
+    try:
+        ScriptShell(json_file).cmdloop()
+    except KeyboardInterrupt:
+        print()
@@ -0,0 +1,268 @@
+import json
+import os
+
+from atomic_file import atomic_write
+from fuzzy_search import MIN_WORD, FuzzyIndex, default_max_distance, words
+from shard_store import manifest_path
+
+'''
+persistent search index for lookups and compound queries (query.py).
+every distinct lowercased value of an indexed field (artist name, location, setting, TOD,
+costume, props) maps to the (episode, scene) positions it appears in, and a trigram map over those distinct strings answers lookup's substring test
+(`search_value in name.lower()`) without scanning every value: only strings holding all of
+the query's trigrams are checked. the lookup loops still run their own test over the scenes
+that are left, so results never change.
+fuzzy() answers misspelled searches from a deletion index over the words of the distinct values
+(fuzzy_search.py), built the first time it is needed.
+'''
+
+INDEX_VERSION = 3
+
+# Fields the index covers: the ones read from a scene's artists, and the scene keys of the rest
+ARTIST_FIELDS = ("artist", "costume", "props")
+SCENE_FIELDS = {"location": "location", "setting": "setting", "tod": "TOD"}
+FIELDS = ARTIST_FIELDS + tuple(SCENE_FIELDS)
+
+
+def data_signature(path: str):
+    """(size, mtime) of the database file, used to tell whether an index is still current."""
+    if os.path.isdir(path):
+        # A sharded store changes exactly when its manifest is rewritten
+        path = manifest_path(path)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def trigrams(value: str) -> set:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def scene_values(field: str, scene: dict) -> set:
+    """The lowercased strings of one scene that a lookup on `field` tests."""
+    if field in ARTIST_FIELDS:
+        return {artist[field].lower() for artist in scene["artists"]}
+    return {scene[SCENE_FIELDS[field]].lower()}
+
+
+class FieldIndex:
+    def __init__(self):
+        self.postings = {}       # lowercased value -> {episode index: [scene indexes]}
+        self._trigrams = None    # trigram -> set of values, built on first use
+        self._fuzzy = None       # (FuzzyIndex of the values' words, word -> set of values), built on first use
+
+    def add(self, value: str, ep_idx: int, scene_idx: int) -> None:
+        if value not in self.postings:
+            self.postings[value] = {}
+            if self._trigrams is not None:
+                for gram in trigrams(value):
+                    self._trigrams.setdefault(gram, set()).add(value)
+            if self._fuzzy is not None:
+                self._add_words(value)
+        self.postings[value].setdefault(ep_idx, []).append(scene_idx)
+
+    def remove_episode(self, ep_idx: int) -> None:
+        for value in list(self.postings):
+            postings = self.postings[value]
+            if postings.pop(ep_idx, None) is not None and not postings:
+                del self.postings[value]
+                if self._trigrams is not None:
+                    for gram in trigrams(value):
+                        self._trigrams[gram].discard(value)
+                if self._fuzzy is not None:
+                    # The word stays in the FuzzyIndex; it just leads to no value any more
+                    for word in words(value):
+                        self._fuzzy[1].get(word, set()).discard(value)
+
+    def _build_trigrams(self) -> dict:
+        if self._trigrams is None:
+            self._trigrams = {}
+            for value in self.postings:
+                for gram in trigrams(value):
+                    self._trigrams.setdefault(gram, set()).add(value)
+        return self._trigrams
+
+    def matching_values(self, search_value: str) -> list:
+        """Distinct values containing `search_value` (already lowercased)."""
+        if len(search_value) < 3:
+            # Too short for a trigram; the distinct values are still far fewer than the scenes
+            return [value for value in self.postings if search_value in value]
+
+        grams = self._build_trigrams()
+        sets = []
+        for gram in trigrams(search_value):
+            values = grams.get(gram)
+            if not values:
+                return []
+            sets.append(values)
+        sets.sort(key=len)
+        candidates = sets[0].intersection(*sets[1:])
+        return [value for value in candidates if search_value in value]
+
+    def _add_words(self, value: str) -> None:
+        index, word_values = self._fuzzy
+        for word in words(value):
+            if len(word) >= MIN_WORD:
+                index.add(word)
+                word_values.setdefault(word, set()).add(value)
+
+    def fuzzy(self, search_value: str, max_distance: int = None) -> list:
+        """
+        (value, distance) for the values a possibly misspelled `search_value` (already lowercased)
+        could mean, closest first. Values containing it are distance 0, as in a normal lookup.
+        Otherwise every word of the query has to come within max_distance edits of a word of the
+        value (by default fuzzy_search.default_max_distance of the word), and the value's distance
+        is the sum; words too short to match fuzzily must appear in the value as they are.
+        """
+        if self._fuzzy is None:
+            self._fuzzy = (FuzzyIndex(), {})
+            for value in self.postings:
+                self._add_words(value)
+        index, word_values = self._fuzzy
+
+        totals = None
+        short_words = []
+        for word in words(search_value):
+            if len(word) < MIN_WORD:
+                short_words.append(word)
+                continue
+            limit = default_max_distance(word) if max_distance is None else max_distance
+            best = {}
+            for term, distance in index.search(word, limit):
+                for value in word_values.get(term, ()):
+                    if distance < best.get(value, limit + 1):
+                        best[value] = distance
+            if totals is None:
+                totals = best
+            else:
+                totals = {value: totals[value] + distance for value, distance in best.items() if value in totals}
+
+        found = {value: distance for value, distance in (totals or {}).items()
+                 if all(word in value for word in short_words)}
+        for value in self.matching_values(search_value):
+            found[value] = 0
+        return sorted(found.items(), key=lambda item: (item[1], item[0]))
+
+    def candidates(self, search_value: str) -> dict:
+        """{episode index: set of scene indexes} where some value contains `search_value`."""
+        found = {}
+        for value in self.matching_values(search_value):
+            for ep_idx, scene_idxs in self.postings[value].items():
+                found.setdefault(ep_idx, set()).update(scene_idxs)
+        return found
+
+
+class SearchIndex:
+    def __init__(self):
+        self.episodes = []       # episode names; a name's position is its episode index
+        self.fields = {field: FieldIndex() for field in FIELDS}
+        self.signature = None
+        self._positions = {}
+
+    @classmethod
+    def build(cls, data: list):
+        index = cls()
+        for entry in data:
+            index.set_episode(entry["episode"], entry["scenes"])
+        return index
+
+    def set_episode(self, name: str, scenes) -> None:
+        """Indexes an episode; an episode that is already indexed is replaced in place."""
+        if name in self._positions:
+            ep_idx = self._positions[name]
+            for field_index in self.fields.values():
+                field_index.remove_episode(ep_idx)
+        else:
+            ep_idx = len(self.episodes)
+            self._positions[name] = ep_idx
+            self.episodes.append(name)
+
+        for scene_idx, scene in enumerate(scenes):
+            for field, field_index in self.fields.items():
+                for value in scene_values(field, scene):
+                    field_index.add(value, ep_idx, scene_idx)
+
+    def recording(self, name: str, scenes):
+        """Passes scenes through unchanged while collecting them for set_episode once the stream ends."""
+        seen = []
+        for scene in scenes:
+            seen.append({"location": scene["location"], "setting": scene["setting"], "TOD": scene["TOD"],
+                         "artists": [{field: artist[field] for field in ARTIST_FIELDS} for artist in scene["artists"]]})
+            yield scene
+        self.set_episode(name, seen)
+
+    def candidates(self, search_type: str, search_value: str) -> dict:
+        return self.fields[search_type].candidates(search_value.lower())
+
+    def fuzzy(self, search_type: str, search_value: str, max_distance: int = None) -> list:
+        return self.fields[search_type].fuzzy(search_value.lower(), max_distance)
+
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "signature": self.signature,
+            "episodes": self.episodes,
+            "fields": {field: {value: [[ep_idx, scene_idxs] for ep_idx, scene_idxs in postings.items()]
+                               for value, postings in field_index.postings.items()}
+                       for field, field_index in self.fields.items()}
+        }
+
+    @classmethod
+    def from_json(cls, raw: dict):
+        index = cls()
+        index.signature = raw["signature"]
+        index.episodes = raw["episodes"]
+        index._positions = {name: idx for idx, name in enumerate(index.episodes)}
+        for field, values in raw["fields"].items():
+            index.fields[field].postings = {value: {ep_idx: scene_idxs for ep_idx, scene_idxs in postings}
+                                            for value, postings in values.items()}
+        return index
+
+
+def save_index(index, index_file: str, data_file: str) -> None:
+    """Writes the index, stamped with the current signature of the database file."""
+    index.signature = data_signature(data_file)
+    with atomic_write(index_file, encoding="utf-8") as f:
+        json.dump(index.to_json(), f, ensure_ascii=False)
+
+
+def load_index(index_file: str, data_file: str):
+    """The saved index if it matches the database file as it is now, otherwise None."""
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if raw.get("version") != INDEX_VERSION or raw.get("signature") != data_signature(data_file):
+        return None
+    return SearchIndex.from_json(raw)
+
+
+def narrow_data(data: list, index, search_type: str, search_value: str) -> list:
+    """Episodes from `data` holding only the scenes the index says match."""
+    return _narrowed(data, index.candidates(search_type, search_value))
+
+
+def narrow_to_value(data: list, index, search_type: str, value: str) -> list:
+    """Episodes from `data` holding only the scenes where the (lowercased) `value` itself appears."""
+    return _narrowed(data, index.fields[search_type].postings.get(value, {}))
+
+
+def narrow_to_candidates(data: list, candidates: dict) -> list:
+    """Episodes from `data` holding only the scenes a query plan (query.plan_query) left."""
+    return _narrowed(data, candidates)
+
+
+def _narrowed(data: list, candidates: dict) -> list:
+    # A candidate episode mapped to None keeps all of its scenes
+    narrowed = []
+    for ep_idx in sorted(candidates):
+        entry = data[ep_idx]
+        scenes = entry["scenes"]
+        scene_idxs = candidates[ep_idx]
+        narrowed.append({"episode": entry["episode"],
+                         "scenes": list(scenes) if scene_idxs is None else [scenes[idx] for idx in sorted(scene_idxs)]})
+    return narrowed
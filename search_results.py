@@ -0,0 +1,185 @@
+import re
+from collections import namedtuple
+from itertools import groupby
+
+from profiling import timed
+
+'''
+artist/location matches (and compound query matches, query.py) as plain records, found once per search and kept.
+the text tree (cli and gui), the markdown export and the gui's results tree are all
+rendered from the same records, so saving a result set never re-runs the search.
+iter_matches/iter_text_blocks are the same steps as generators, for the cli's streamed lookup.
+'''
+
+# artist: the searched artist for an artist search (or a query with an artist: condition), None for a location search
+# others: the rest of the scene's artists (all of them for a location search)
+Match = namedtuple("Match", ["episode", "scene", "artist", "others"])
+
+
+@timed("search scan")
+def find_matches(data: list, search_type: str, search_value: str, check=None, exact: bool = False) -> list:
+    """
+    The matching scenes of `data` in episode/scene order. check() is called before each
+    episode so a caller can stop a long search by raising from it.
+    exact=True matches names/locations equal to search_value (ignoring case) instead of containing it.
+    """
+    return list(iter_matches(data, search_type, search_value, check, exact))
+
+
+def iter_matches(data, search_type: str, search_value: str, check=None, exact: bool = False):
+    """find_matches as a generator: `data` can be a stream, each match comes out as its episode goes past."""
+    search_value = search_value.lower()
+
+    for entry in data:
+        if check:
+            check()
+        for scene in entry["scenes"]:
+            if search_type == "artist":
+                # Check if the searched artist is in this scene
+                searched_artist, other_artists = split_artists(scene["artists"], search_value, exact)
+                if searched_artist:
+                    yield Match(entry["episode"], scene, searched_artist, other_artists)
+
+            else:
+                location = scene["location"].lower()
+                if location == search_value if exact else search_value in location:
+                    yield Match(entry["episode"], scene, None, scene["artists"])
+
+
+def split_artists(artists, search_value: str, exact: bool = False) -> tuple:
+    """
+    (searched artist, other artists) of a scene for an artist lookup on `search_value` (lowercased):
+    the last artist whose name matches, and the artists whose names don't. None if none match.
+    """
+    searched_artist = None
+    other_artists = []
+    for artist in artists:
+        name = artist["artist"].lower()
+        if name == search_value if exact else search_value in name:
+            searched_artist = artist
+        else:
+            other_artists.append(artist)
+    return searched_artist, other_artists
+
+
+def by_episode(matches):
+    """(episode, [matches]) pairs, in order; `matches` is only read one episode ahead."""
+    for episode, group in groupby(matches, key=lambda match: match.episode):
+        yield episode, list(group)
+
+
+@timed("result rendering")
+def render_text(matches: list, search_type: str, search_value: str, episode_prefix: str = "") -> list:
+    """The |_ tree lookup prints, as a list of lines (the cli prefixes episodes with "ep")."""
+    return [line for block in iter_text_blocks(matches, search_type, search_value, episode_prefix) for line in block]
+
+
+def iter_text_blocks(matches, search_type: str, search_value: str, episode_prefix: str = ""):
+    """render_text in pieces: the header, then one list of lines per episode once its matches are in, then the footer."""
+    yield ["-" * 75, f"Search Results for {search_type.title()}: {search_value.lower()}"]
+
+    for episode, group in by_episode(matches):
+        lines = [f"|_{episode_prefix}{episode}"]
+        for match in group:
+            scene = match.scene
+            lines.append(f"    |_synopsis : {scene.get('synopsis', '')}")
+            lines.append(f"    |_scene {scene['scene_number']} : {scene['setting']}, {scene['TOD']}")
+
+            if match.artist is not None:
+                lines.append(f"        |_location : {scene['location']}")
+                lines.append(f"            |_artist_name : {match.artist['artist']}")
+                lines.append(f"                |_costume : {match.artist['costume']}")
+                lines.append(f"                |_props : {match.artist['props']}")
+
+                for idx, artist in enumerate(match.others, 1):
+                    lines.append("     ")
+                    lines.append(f"            |_other_artist_{idx} : {artist['artist']}")
+                    lines.append(f"                |_costume : {artist['costume']}")
+                    lines.append(f"                |_props : {artist['props']}")
+            else:
+                if search_type != "location":
+                    # A compound query; a location search has the location in its header already
+                    lines.append(f"        |_location : {scene['location']}")
+                for idx, artist in enumerate(match.others, 1):
+                    lines.append(f"            |_artist_{idx} : {artist['artist']}")
+                    lines.append(f"                |_costume : {artist['costume']}")
+                    lines.append(f"                |_props : {artist['props']}")
+                    if idx < len(match.others):
+                        lines.append("     ")
+            lines.append("")
+        yield lines
+
+    yield ["-" * 75]
+
+
+@timed("result rendering")
+def render_ranked(ranked: list, search_type: str, search_value: str, episode_prefix: str = "") -> list:
+    """
+    A fuzzy lookup (storage.ranked_matches) as lines: the closest names/locations with their
+    edit distance, then the usual |_ tree for each of them.
+    """
+    lines = [f"Closest {search_type} matches for: {search_value.lower()}"]
+    for value, distance, matches in ranked:
+        lines.append(f"    {value} : distance {distance}, {len(matches)} scene(s)")
+    if not ranked:
+        lines.append("    (nothing close enough)")
+    for value, distance, matches in ranked:
+        lines.extend(render_text(matches, search_type, value, episode_prefix))
+    return lines
+
+
+def export_file_name(search_value: str, ext: str) -> str:
+    """Default file name for saved results; a query's colons and quotes can't go in a windows file name."""
+    return "search_results_" + re.sub(r'[\\/:*?"<>|]+', "_", search_value) + ext
+
+
+def flatten_ranked(ranked: list) -> list:
+    """The matches of a fuzzy lookup in rank order, e.g. to export them like a normal result set."""
+    return [match for _, _, matches in ranked for match in matches]
+
+
+@timed("result rendering")
+def render_markdown(matches: list, search_type: str, search_value: str) -> str:
+    """The markdown checklist the gui's "Export As > Markdown" saves."""
+    results = []
+    results.append(f"## search results for \"{search_value}\"")
+
+    for episode, group in by_episode(matches):
+        results.append(f"\n# {episode}")
+        for match in group:
+            scene = match.scene
+            if match.artist is not None:
+                results.append(f"- [ ] Scene {scene['scene_number']} :  ")
+                results.append(f"\tSynopsis : {scene.get('synopsis', '')}  ")
+                results.append(f"\t\tlocation : {scene['location']}  ")
+                results.append(f"\t\tsetting : {scene['setting'].replace('.', '')}  ")
+                results.append(f"\t\tTOD : {scene['TOD']}  ")
+                results.append("\n\t Artists  ")
+
+                # Add searched artist
+                results.append(f"\t- artist_1: {match.artist['artist']}")
+                results.append(f"\t\t- costume : {match.artist['costume']}")
+                results.append(f"\t\t- props : {match.artist['props']}")
+
+                # Add other artists
+                for idx, artist in enumerate(match.others, 2):
+                    results.append(f"\n\t- artist_{idx} : {artist['artist']}")
+                    results.append(f"\t\t- costume : {artist['costume']}")
+                    results.append(f"\t\t- props : {artist['props']}")
+                results.append("")
+            else:
+                results.append(f"- [ ] Scene {scene['scene_number']}")
+                results.append(f"  Synopsis: {scene.get('synopsis', '')}  ")
+                if search_type != "location":
+                    results.append(f"  location : {scene['location']}, {scene['setting'].replace('.', '')}, {scene['TOD']}  ")
+                results.append("\n\t Artists  ")
+
+                for idx, artist in enumerate(match.others, 1):
+                    results.append(f"\t- artist_{idx}: {artist['artist']}")
+                    results.append(f"\t\t- costume : {artist['costume']}")
+                    results.append(f"\t\t- props : {artist['props']}")
+                    if idx < len(match.others):
+                        results.append("")
+                results.append("")
+
+    return "\n".join(results)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+from atomic_file import atomic_write, open_temp
+from compact_model import compact_object, json_default
+
+'''
+sharded episode store (a data.shards directory): every episode in its own json file under
+episodes/, and a small manifest.json listing the episodes in order with their scene count and
+the sha256 of their shard. duplicate checks and episode listings only read the manifest,
+adding an episode writes one shard plus the manifest, and load_sharded hands back a lazy
+sequence that parses a shard the first time its episode is asked for.
+shards are named after their hash and the manifest is swapped in last, so an interrupted
+write leaves the store as it was; the shards of the episodes a write replaced are removed after.
+shards are written without any locking (each into its own temp file); only the manifest update
+(read, merge, write, remove replaced shards) holds manifest.lock, so a gui add and a cli sync
+running side by side wait for each other there instead of dropping each other's episodes.
+a lock left behind by a killed process is taken over once it is LOCK_STALE seconds old.
+'''
+
+MANIFEST_VERSION = 1
+MANIFEST = "manifest.json"
+LOCK = "manifest.lock"
+SHARD_DIR = "episodes"
+
+# Parsed episodes a ShardedEpisodes keeps in memory
+CACHE_SIZE = 64
+
+# A manifest update takes milliseconds; a lock this old (seconds) was left by a killed process
+LOCK_STALE = 30
+LOCK_POLL = 0.01
+
+
+def is_sharded(path: str) -> bool:
+    return path.rstrip("/\\").endswith(".shards")
+
+
+def manifest_path(path: str) -> str:
+    return os.path.join(path, MANIFEST)
+
+
+def read_manifest(path: str) -> list:
+    """The manifest records ({"episode", "scenes", "hash", "file"}) in episode order; [] for a new store."""
+    try:
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return []
+    if raw.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"'{path}' has an unsupported manifest version: {raw.get('version')}")
+    return raw["episodes"]
+
+
+@contextmanager
+def manifest_lock(path: str):
+    """Holds the store's manifest lock (an exclusively created lock file) for a manifest update."""
+    os.makedirs(path, exist_ok=True)
+    lock_file = os.path.join(path, LOCK)
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > LOCK_STALE:
+                    os.remove(lock_file)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(LOCK_POLL)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lock_file)
+
+
+def _write_manifest(path: str, records: list, old_records: list = ()) -> None:
+    """Swaps in a manifest listing `records`, then removes the shards of old_records it no longer lists."""
+    with atomic_write(manifest_path(path), encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "episodes": records}, f, ensure_ascii=False, indent=4)
+
+    # Only the shards this write replaced; a shard another writer just added was never in old_records
+    listed = {record["file"] for record in records}
+    for record in old_records:
+        if record["file"] not in listed:
+            try:
+                os.remove(os.path.join(path, SHARD_DIR, record["file"]))
+            except FileNotFoundError:
+                pass
+
+
+def _write_shard(path: str, name: str, scenes) -> dict:
+    """Writes one episode whose scenes come from an iterator; returns its manifest record."""
+    shard_dir = os.path.join(path, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    f, tmp_file = open_temp(shard_dir, "wb")
+    digest = hashlib.sha256()
+    count = 0
+    try:
+        with f:
+            def write(text: str) -> None:
+                chunk = text.encode("utf-8")
+                digest.update(chunk)
+                f.write(chunk)
+
+            write(f"{{\"episode\": {json.dumps(name, ensure_ascii=False)}, \"scenes\": [")
+            for scene in scenes:
+                write((", " if count else "") + json.dumps(scene, ensure_ascii=False, default=json_default))
+                count += 1
+            write("]}")
+        file_name = digest.hexdigest()[:32] + ".json"
+        os.replace(tmp_file, os.path.join(shard_dir, file_name))
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return {"episode": name, "scenes": count, "hash": digest.hexdigest(), "file": file_name}
+
+
+def _merge(records: list, new_records: list) -> list:
+    """records with each new record replacing the episode of the same name in place, or appended."""
+    positions = {record["episode"]: idx for idx, record in enumerate(records)}
+    for record in new_records:
+        if record["episode"] in positions:
+            records[positions[record["episode"]]] = record
+        else:
+            positions[record["episode"]] = len(records)
+            records.append(record)
+    return records
+
+
+def sharded_episode_names(path: str) -> list:
+    return [record["episode"] for record in read_manifest(path)]
+
+
+def append_sharded_stream(path: str, name: str, scenes) -> None:
+    """Adds (or replaces) one episode whose scenes come from an iterator: one shard, one manifest write."""
+    record = _write_shard(path, name, scenes)
+    with manifest_lock(path):
+        old_records = read_manifest(path)
+        _write_manifest(path, _merge(list(old_records), [record]), old_records)
+
+
+def write_sharded_episodes(path: str, episodes: list) -> None:
+    """Adds or replaces (by episode name, in place) finished episodes, writing only their shards."""
+    new_records = [_write_shard(path, episode["episode"], episode["scenes"]) for episode in episodes]
+    with manifest_lock(path):
+        old_records = read_manifest(path)
+        _write_manifest(path, _merge(list(old_records), new_records), old_records)
+
+
+def write_sharded(path: str, episodes) -> None:
+    """Rewrites the whole store with `episodes`; shards whose content is unchanged end up as they were."""
+    records = _merge([], [_write_shard(path, episode["episode"], episode["scenes"]) for episode in episodes])
+    os.makedirs(os.path.join(path, SHARD_DIR), exist_ok=True)
+    with manifest_lock(path):
+        _write_manifest(path, records, read_manifest(path))
+
+
+class ShardedEpisodes(Sequence):
+    """
+    The episodes of a sharded store as a read-only sequence, in manifest order.
+    A shard is parsed when its episode is first asked for and the last `cache_size` parsed
+    episodes are kept. They are keyed by shard hash, so a replaced episode is never served stale.
+    """
+
+    def __init__(self, path: str, compact: bool = False, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.compact = compact
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # The gui formats on the tk thread while workers search the same data
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-reads the manifest, e.g. after an add. Cached episodes that are still current are kept."""
+        self.records = read_manifest(self.path)
+
+    def names(self) -> list:
+        return [record["episode"] for record in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        record = self.records[idx]
+        key = record["hash"]
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+
+        with open(os.path.join(self.path, SHARD_DIR, record["file"]), "r", encoding="utf-8") as f:
+            # object_hook builds scenes and artists compact as they are parsed
+            entry = json.load(f, object_hook=compact_object) if self.compact else json.load(f)
+
+        with self._lock:
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+
+def load_sharded(path: str, compact: bool = False) -> ShardedEpisodes:
+    return ShardedEpisodes(path, compact)
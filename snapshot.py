@@ -0,0 +1,69 @@
+import gc
+import os
+import pickle
+from contextlib import contextmanager
+
+from atomic_file import atomic_write
+from compact_model import Appearance, Scene, compact_data, plain_appearance, plain_scene
+
+'''
+binary snapshot of data.json (data.snapshot.pickle) for fast cold loads.
+the episodes are pickled (protocol 5) in the compact model: every scene and appearance is
+stored as its constructor arguments and each distinct string once (pickle's memo works as the
+string table), so the file is a fraction of the indented json. a small header pickle carries
+the format version and the (size, mtime) of the data.json it was made from; a snapshot that
+doesn't match the json file as it is now is ignored and rewritten on the next load.
+loading pauses the cyclic gc, which otherwise keeps rescanning the millions of new objects.
+only Scene/Appearance can be named in a snapshot, nothing else is ever imported while loading.
+'''
+
+SNAPSHOT_VERSION = 1
+
+_CLASSES = {"Scene": Scene, "Appearance": Appearance}
+_PLAIN = {"Scene": plain_scene, "Appearance": plain_appearance}
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, f, compact: bool):
+        super().__init__(f)
+        self.classes = _CLASSES if compact else _PLAIN
+
+    def find_class(self, module, name):
+        if module == "compact_model" and name in self.classes:
+            return self.classes[name]
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a snapshot")
+
+
+@contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_snapshot(path: str, data: list, signature) -> None:
+    """Writes `data` (dicts or compact objects) with the signature of the json file it matches."""
+    with gc_paused(), atomic_write(path, "wb") as f:
+        pickle.dump((SNAPSHOT_VERSION, signature), f, protocol=5)
+        pickle.dump(compact_data(data), f, protocol=5)
+
+
+def read_snapshot(path: str, signature, compact: bool = False):
+    """
+    The snapshot's episodes (compact objects, or plain dicts like json.load gives)
+    if it exists and was made from the json file as it is now, otherwise None.
+    """
+    if signature is None or not os.path.exists(path):
+        return None
+    try:
+        with gc_paused(), open(path, "rb") as f:
+            # One unpickler per pickle: their memos must not run into each other
+            if _SnapshotUnpickler(f, compact).load() != (SNAPSHOT_VERSION, signature):
+                return None
+            return _SnapshotUnpickler(f, compact).load()
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return None
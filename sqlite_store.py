@@ -0,0 +1,274 @@
+import sqlite3
+
+'''
+optional sqlite backend (data.db): episodes, scenes and artist appearances in their own tables,
+with b-tree indexes on artist/location and fts5 trigram tables for the substring searches lookup does.
+search_sqlite only pulls the matching scenes out of the database, so a lookup no longer
+has to load and scan every episode; query_sqlite does the same for a compound query.
+'''
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    episode_id INTEGER NOT NULL REFERENCES episodes(id),
+    scene_number INTEGER,
+    scene_heading TEXT,
+    synopsis TEXT,
+    setting TEXT,
+    location TEXT,
+    tod TEXT
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    id INTEGER PRIMARY KEY,
+    scene_id INTEGER NOT NULL REFERENCES scenes(id),
+    artist TEXT,
+    costume TEXT,
+    props TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scenes_episode ON scenes(episode_id);
+CREATE INDEX IF NOT EXISTS idx_scenes_location ON scenes(location COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_appearances_scene ON appearances(scene_id);
+CREATE INDEX IF NOT EXISTS idx_appearances_artist ON appearances(artist COLLATE NOCASE);
+"""
+
+# Trigram fts5 tables (sqlite 3.34+) kept in step with the base tables by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS artist_fts USING fts5(artist, content='appearances', content_rowid='id', tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS location_fts USING fts5(location, content='scenes', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS appearances_ai AFTER INSERT ON appearances BEGIN
+    INSERT INTO artist_fts(rowid, artist) VALUES (new.id, new.artist);
+END;
+CREATE TRIGGER IF NOT EXISTS appearances_ad AFTER DELETE ON appearances BEGIN
+    INSERT INTO artist_fts(artist_fts, rowid, artist) VALUES ('delete', old.id, old.artist);
+END;
+CREATE TRIGGER IF NOT EXISTS scenes_ai AFTER INSERT ON scenes BEGIN
+    INSERT INTO location_fts(rowid, location) VALUES (new.id, new.location);
+END;
+CREATE TRIGGER IF NOT EXISTS scenes_ad AFTER DELETE ON scenes BEGIN
+    INSERT INTO location_fts(location_fts, rowid, location) VALUES ('delete', old.id, old.location);
+END;
+"""
+
+# Keeps IN (...) lists under sqlite's bound-parameter limit
+CHUNK = 500
+
+
+def is_sqlite(path: str) -> bool:
+    return path.endswith(".db") or path.endswith(".sqlite")
+
+
+def _contains(haystack, needle) -> bool:
+    # Same test lookup uses, including python's unicode lowercasing
+    return haystack is not None and needle in haystack.lower()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        # No fts5/trigram in this sqlite build; searches fall back to a table scan
+        pass
+    conn.create_function("py_contains", 2, _contains, deterministic=True)
+    return conn
+
+
+def _has_fts(conn) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'artist_fts'").fetchone()
+    return row is not None
+
+
+def _chunks(items: list):
+    for start in range(0, len(items), CHUNK):
+        yield items[start:start + CHUNK]
+
+
+def _insert_scene(conn, episode_id: int, scene: dict) -> None:
+    cursor = conn.execute(
+        "INSERT INTO scenes (episode_id, scene_number, scene_heading, synopsis, setting, location, tod) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (episode_id, scene["scene_number"], scene["scene_heading"], scene.get("synopsis"),
+         scene["setting"], scene["location"], scene["TOD"])
+    )
+    conn.executemany(
+        "INSERT INTO appearances (scene_id, artist, costume, props) VALUES (?, ?, ?, ?)",
+        [(cursor.lastrowid, artist["artist"], artist["costume"], artist["props"]) for artist in scene["artists"]]
+    )
+
+
+def _upsert_episode(conn, name: str, scenes) -> None:
+    """Inserts an episode, or replaces the scenes of an existing one while keeping its position."""
+    row = conn.execute("SELECT id FROM episodes WHERE name = ?", (name,)).fetchone()
+    if row:
+        episode_id = row[0]
+        conn.execute("DELETE FROM appearances WHERE scene_id IN (SELECT id FROM scenes WHERE episode_id = ?)",
+                     (episode_id,))
+        conn.execute("DELETE FROM scenes WHERE episode_id = ?", (episode_id,))
+    else:
+        episode_id = conn.execute("INSERT INTO episodes (name) VALUES (?)", (name,)).lastrowid
+    for scene in scenes:
+        _insert_scene(conn, episode_id, scene)
+
+
+def sqlite_episode_names(path: str) -> list:
+    conn = connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM episodes ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def append_sqlite_stream(path: str, name: str, scenes) -> None:
+    """Adds one episode, inserting scenes as the iterator produces them; rolled back on error."""
+    conn = connect(path)
+    try:
+        with conn:
+            _upsert_episode(conn, name, scenes)
+    finally:
+        conn.close()
+
+
+def write_sqlite_episodes(path: str, episodes: list) -> None:
+    """Adds or replaces (in place) finished episodes in one transaction."""
+    conn = connect(path)
+    try:
+        with conn:
+            for episode in episodes:
+                _upsert_episode(conn, episode["episode"], episode["scenes"])
+    finally:
+        conn.close()
+
+
+def write_sqlite(path: str, data: list) -> None:
+    """Replaces the whole database with `data`."""
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM appearances")
+            conn.execute("DELETE FROM scenes")
+            conn.execute("DELETE FROM episodes")
+            for episode in data:
+                _upsert_episode(conn, episode["episode"], episode["scenes"])
+    finally:
+        conn.close()
+
+
+def _build_episodes(conn, scene_ids=None) -> list:
+    """
+    Rebuilds the list-of-episodes structure, for every scene or only for `scene_ids`,
+    in the original episode and scene order.
+    """
+    scene_query = ("SELECT s.id, s.episode_id, e.name, s.scene_number, s.scene_heading, s.synopsis, "
+                   "s.setting, s.location, s.tod FROM scenes s JOIN episodes e ON e.id = s.episode_id")
+    appearance_query = "SELECT scene_id, artist, costume, props FROM appearances"
+    episodes = {}
+
+    if scene_ids is None:
+        # Full load: every episode, including ones without scenes
+        for episode_id, name in conn.execute("SELECT id, name FROM episodes ORDER BY id"):
+            episodes[episode_id] = {"episode": name, "scenes": []}
+        scene_rows = conn.execute(scene_query).fetchall()
+        appearance_rows = conn.execute(f"{appearance_query} ORDER BY id").fetchall()
+    else:
+        scene_rows, appearance_rows = [], []
+        for chunk in _chunks(sorted(scene_ids)):
+            marks = ",".join("?" * len(chunk))
+            scene_rows.extend(conn.execute(f"{scene_query} WHERE s.id IN ({marks})", chunk))
+            appearance_rows.extend(conn.execute(f"{appearance_query} WHERE scene_id IN ({marks}) ORDER BY scene_id, id", chunk))
+
+    artists = {}
+    for scene_id, artist, costume, props in appearance_rows:
+        artists.setdefault(scene_id, []).append({"artist": artist, "costume": costume, "props": props})
+
+    scene_rows.sort(key=lambda row: (row[1], row[0]))
+    for scene_id, episode_id, name, number, heading, synopsis, setting, location, tod in scene_rows:
+        scene = {"scene_number": number, "scene_heading": heading}
+        if synopsis is not None:
+            scene["synopsis"] = synopsis
+        scene.update({"setting": setting, "location": location, "TOD": tod, "artists": artists.get(scene_id, [])})
+        episodes.setdefault(episode_id, {"episode": name, "scenes": []})["scenes"].append(scene)
+
+    return list(episodes.values())
+
+
+def load_sqlite(path: str) -> list:
+    conn = connect(path)
+    try:
+        return _build_episodes(conn)
+    finally:
+        conn.close()
+
+
+def _matching_scene_ids(conn, search_type: str, search_value: str) -> set:
+    if search_type == "artist":
+        fts, base, column, link = "artist_fts", "appearances", "artist", "scene_id"
+    else:
+        fts, base, column, link = "location_fts", "scenes", "location", "id"
+
+    # Trigrams need at least three characters to narrow anything
+    if _has_fts(conn) and len(search_value) >= 3:
+        phrase = '"' + search_value.replace('"', '""') + '"'
+        rows = conn.execute(
+            f"SELECT b.{link}, b.{column} FROM {fts} f JOIN {base} b ON b.id = f.rowid WHERE {fts} MATCH ?",
+            (phrase,)
+        )
+        # The trigram match is case-folded by sqlite; confirm with python's own test
+        return {scene_id for scene_id, value in rows if _contains(value, search_value)}
+
+    rows = conn.execute(f"SELECT {link} FROM {base} WHERE py_contains({column}, ?)", (search_value,))
+    return {row[0] for row in rows}
+
+
+def search_sqlite(path: str, search_type: str, search_value: str) -> list:
+    """
+    Episodes holding only the scenes that match the search, in the same shape as load_data,
+    so the existing lookup loops can run over it unchanged.
+    """
+    conn = connect(path)
+    try:
+        scene_ids = _matching_scene_ids(conn, search_type, search_value.lower())
+        return _build_episodes(conn, scene_ids) if scene_ids else []
+    finally:
+        conn.close()
+
+
+def _query_clause(conn, field: str, value: str) -> str:
+    # One condition of a compound query as a WHERE clause over scenes s / episodes e
+    fts = _has_fts(conn) and len(value) >= 3
+    if field == "episode":
+        return "py_contains(e.name, ?)"
+    if field == "location" and fts:
+        return "s.id IN (SELECT rowid FROM location_fts WHERE location_fts MATCH ?)"
+    if field in ("location", "setting", "tod"):
+        return f"py_contains(s.{field}, ?)"
+    if field == "artist" and fts:
+        return ("s.id IN (SELECT a.scene_id FROM artist_fts f JOIN appearances a ON a.id = f.rowid "
+                "WHERE artist_fts MATCH ?)")
+    return f"EXISTS (SELECT 1 FROM appearances a WHERE a.scene_id = s.id AND py_contains(a.{field}, ?))"
+
+
+def query_sqlite(path: str, conditions: list) -> list:
+    """
+    Episodes holding the candidate scenes of a compound query (query.py), in the same shape as
+    load_data. The conditions go to sqlite as one statement, so its planner picks which index
+    to start from; the trigram matches are case-folded by sqlite, so the caller still runs
+    query.find_query_matches over the result.
+    """
+    conn = connect(path)
+    try:
+        clauses, params = [], []
+        for field, value in conditions:
+            clause = _query_clause(conn, field, value)
+            clauses.append(clause)
+            params.append('"' + value.replace('"', '""') + '"' if "MATCH" in clause else value)
+        rows = conn.execute("SELECT s.id FROM scenes s JOIN episodes e ON e.id = s.episode_id WHERE "
+                            + " AND ".join(clauses), params)
+        scene_ids = {row[0] for row in rows}
+        return _build_episodes(conn, scene_ids) if scene_ids else []
+    finally:
+        conn.close()
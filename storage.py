@@ -0,0 +1,643 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from atomic_file import atomic_write
+from compact_model import compact_data, compact_episode, json_default, load_compact_json
+from fountain_parser import episode_name, iter_fountain_scenes, iter_fountain_scenes_mmap, parse_fountain_file
+from json_stream import iter_json_array
+from jsonl_store import append_jsonl, append_jsonl_stream, is_jsonl, jsonl_episode_names, load_jsonl, write_jsonl
+from profiling import phase, timed, timed_iter
+from query import find_query_matches, plan_query
+from search_index import (SearchIndex, data_signature, load_index, narrow_data, narrow_to_candidates, narrow_to_value,
+                          save_index)
+from search_results import find_matches, iter_matches
+from shard_store import (ShardedEpisodes, append_sharded_stream, is_sharded, load_sharded, read_manifest,
+                         sharded_episode_names, write_sharded, write_sharded_episodes)
+from snapshot import gc_paused, read_snapshot, write_snapshot
+from sqlite_store import (append_sqlite_stream, is_sqlite, load_sqlite, query_sqlite, search_sqlite,
+                          sqlite_episode_names, write_sqlite, write_sqlite_episodes)
+
+'''
+reading and writing the episode database for the cli and both gui versions.
+a path ending in .jsonl uses the append-only log in jsonl_store, .db/.sqlite the sqlite backend
+in sqlite_store, .shards the per-episode directory in shard_store, anything else is the classic data.json.
+the data.json layout is exactly what json.dump(..., ensure_ascii=False, indent=4) produces,
+so files written here and files written by the older versions are interchangeable.
+'''
+
+
+# Most distinct names/locations a fuzzy lookup lists
+FUZZY_LIMIT = 20
+
+
+def default_data_file() -> str:
+    """The migrated database (data.db, data.shards, then data.jsonl) if there is one, data.json otherwise."""
+    for candidate in ("data.db", "data.shards", "data.jsonl"):
+        if os.path.exists(candidate):
+            return candidate
+    return "data.json"
+
+
+def sidecar_path(json_file: str, suffix: str) -> str:
+    """
+    Path of a helper file kept next to the database, e.g. data.json -> data.sync.json.
+    Other backends keep their extension in the name (data.jsonl -> data-jsonl.sync.json),
+    so a migrated database never shares helper files with the original.
+    """
+    # data.shards/ (tab completion of a directory) is the same store as data.shards
+    base, ext = os.path.splitext(json_file.rstrip("/\\"))
+    if ext == ".json":
+        return base + suffix
+    return f"{base}-{ext.lstrip('.')}{suffix}"
+
+
+def _is_json(json_file: str) -> bool:
+    # The classic data.json, i.e. none of the other backends
+    return not (is_jsonl(json_file) or is_sqlite(json_file) or is_sharded(json_file))
+
+
+def search_index_path(json_file: str) -> str:
+    return sidecar_path(json_file, ".search_index.json")
+
+
+def snapshot_path(json_file: str) -> str:
+    return sidecar_path(json_file, ".snapshot.pickle")
+
+
+def _fresh_search_index(json_file: str):
+    """The saved search index, if there is one and it still matches the database file."""
+    if is_sqlite(json_file):
+        return None
+    return load_index(search_index_path(json_file), json_file)
+
+
+@timed("search index")
+def search_index(json_file: str, data: list):
+    """The search index for `data`, rebuilt and saved if it is missing or out of date."""
+    index = _fresh_search_index(json_file)
+    if index is None or index.episodes != episode_names(data):
+        index = SearchIndex.build(data)
+        # sqlite searches with its own indexes and never reads this one back
+        if os.path.exists(json_file) and not is_sqlite(json_file):
+            save_index(index, search_index_path(json_file), json_file)
+    return index
+
+
+def episode_names(data) -> list:
+    """Names of the loaded episodes; a sharded store answers from its manifest without parsing shards."""
+    if isinstance(data, ShardedEpisodes):
+        return data.names()
+    return [entry["episode"] for entry in data]
+
+
+@timed("json load")
+def load_data(json_file: str, compact: bool = False, save_snapshot: bool = True) -> list:
+    """
+    Loads the list of episodes, or an empty list if the file is missing or broken.
+    compact=True gives scenes and artists as compact_model objects instead of dicts.
+    data.json is read from its binary snapshot when that is current, and the snapshot
+    is (re)written after a load that had to parse the json, unless save_snapshot is False
+    (the caller is about to rewrite data.json, which would make it stale straight away).
+    A .shards store gives a lazy ShardedEpisodes sequence instead of a list.
+    """
+    if is_sharded(json_file):
+        return load_sharded(json_file, compact)
+    if is_jsonl(json_file):
+        data = load_jsonl(json_file)
+    elif is_sqlite(json_file):
+        data = load_sqlite(json_file) if os.path.exists(json_file) else []
+    elif not os.path.exists(json_file):
+        return []
+    else:
+        signature = data_signature(json_file)
+        data = read_snapshot(snapshot_path(json_file), signature, compact)
+        if data is not None:
+            return data
+        try:
+            with gc_paused():
+                if compact:
+                    # Built straight from the parser, without a dict version of the whole file
+                    data = load_compact_json(json_file)
+                else:
+                    with open(json_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+        except json.JSONDecodeError:
+            return []
+        if save_snapshot:
+            try:
+                with phase("snapshot write"):
+                    write_snapshot(snapshot_path(json_file), data, signature)
+            except OSError:
+                # Only a cache; a read-only directory just means no snapshot
+                pass
+        return data
+    return compact_data(data) if compact else data
+
+
+def stream_episodes(json_file: str):
+    """
+    The episodes one at a time, for a single pass over the whole database (lookup, exportMd).
+    data.json is decoded incrementally, so only the current episode is in memory; the other
+    backends come from load_data (already lazy for .shards).
+    A missing data.json is an empty stream. A broken one raises json.JSONDecodeError when the
+    reader gets to the bad part, after the episodes before it, so a caller can't mistake a
+    truncated file for a complete result.
+    """
+    if not _is_json(json_file):
+        yield from load_data(json_file)
+        return
+    if not os.path.exists(json_file):
+        return
+    yield from timed_iter("json load", iter_json_array(json_file))
+
+
+@timed("json dump")
+def save_data(json_file: str, data: list) -> None:
+    """Writes the whole list of episodes, swapping the file in only once it is complete."""
+    if is_jsonl(json_file):
+        write_jsonl(json_file, data)
+        return
+    if is_sqlite(json_file):
+        write_sqlite(json_file, data)
+        return
+    if is_sharded(json_file):
+        write_sharded(json_file, data)
+        return
+    with atomic_write(json_file, encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=json_default)
+
+
+def _indented(obj, prefix: str) -> str:
+    text = json.dumps(obj, ensure_ascii=False, indent=4, default=json_default)
+    return prefix + text.replace("\n", "\n" + prefix)
+
+
+def _write_episode(f, name: str, scenes) -> None:
+    f.write("    {\n")
+    f.write(f"        \"episode\": {json.dumps(name, ensure_ascii=False)},\n")
+    f.write("        \"scenes\": [")
+    first = True
+    for scene in scenes:
+        f.write("\n" if first else ",\n")
+        f.write(_indented(scene, " " * 12))
+        first = False
+    f.write("]\n" if first else "\n        ]\n")
+    f.write("    }")
+
+
+def write_data(json_file: str, existing_data: list, name: str, scenes) -> None:
+    """
+    Writes existing_data plus one new episode whose scenes come from an iterator.
+    Scenes are written as they are produced, and the file is swapped in only once
+    everything has been written, so a parse error never leaves a half-written data.json.
+    """
+    with atomic_write(json_file, encoding="utf-8") as f:
+        f.write("[\n")
+        for entry in existing_data:
+            f.write(_indented(entry, "    "))
+            f.write(",\n")
+        _write_episode(f, name, scenes)
+        f.write("\n]")
+
+
+@timed("duplicate check")
+def _existing(json_file: str) -> tuple:
+    """
+    (episode names, loaded data) for a duplicate check. The log, sqlite and the shard manifest
+    only need the names, so their data is None; data.json has to be loaded whole anyway, so it is handed back for reuse.
+    """
+    if is_jsonl(json_file):
+        return jsonl_episode_names(json_file), None
+    if is_sqlite(json_file):
+        return sqlite_episode_names(json_file), None
+    if is_sharded(json_file):
+        return sharded_episode_names(json_file), None
+    existing_data = load_data(json_file, save_snapshot=False)
+    return [entry["episode"] for entry in existing_data], existing_data
+
+
+def store_episodes(json_file: str, episodes: list, existing_data: list = None) -> None:
+    """
+    Adds or replaces (by episode name, in place) finished episodes.
+    The log just gets new lines, sqlite one transaction, a sharded store one shard per episode;
+    data.json is rewritten once for the whole list.
+    """
+    if is_sqlite(json_file):
+        write_sqlite_episodes(json_file, episodes)
+        return
+
+    # A search index that is current before the write is updated along with it;
+    # a stale one is simply rebuilt by the next lookup
+    with phase("search index"):
+        index = _fresh_search_index(json_file)
+    with phase("json dump"):
+        if is_jsonl(json_file):
+            append_jsonl(json_file, episodes)
+        elif is_sharded(json_file):
+            write_sharded_episodes(json_file, episodes)
+        else:
+            _replace_episodes(json_file, episodes, existing_data)
+    if index is not None:
+        with phase("search index"):
+            for episode in episodes:
+                index.set_episode(episode["episode"], episode["scenes"])
+            save_index(index, search_index_path(json_file), json_file)
+
+
+def _replace_episodes(json_file: str, episodes: list, existing_data: list = None) -> None:
+    data = load_data(json_file, save_snapshot=False) if existing_data is None else existing_data
+    positions = {entry["episode"]: idx for idx, entry in enumerate(data)}
+    for episode in episodes:
+        if episode["episode"] in positions:
+            data[positions[episode["episode"]]] = episode
+        else:
+            positions[episode["episode"]] = len(data)
+            data.append(episode)
+    save_data(json_file, data)
+
+
+def _scene_stream(input_file: str, use_mmap: bool = False):
+    return iter_fountain_scenes_mmap(input_file) if use_mmap else iter_fountain_scenes(input_file)
+
+
+def _stream_episode(json_file: str, name: str, scenes, existing_data: list = None, index=None) -> None:
+    """
+    Writes one new episode whose scenes come from an iterator, keeping `index` (if any) in step.
+    existing_data is only needed by data.json, which has to be rewritten whole.
+    """
+    if index is not None:
+        scenes = index.recording(name, scenes)
+
+    if existing_data is None and _is_json(json_file):
+        existing_data = load_data(json_file, save_snapshot=False)
+
+    # The scenes are parsed while they are written; those phases are timed on their own
+    with phase("json dump"):
+        if is_jsonl(json_file):
+            append_jsonl_stream(json_file, name, scenes)
+        elif is_sqlite(json_file):
+            append_sqlite_stream(json_file, name, scenes)
+        elif is_sharded(json_file):
+            append_sharded_stream(json_file, name, scenes)
+        else:
+            write_data(json_file, existing_data, name, scenes)
+
+    if index is not None:
+        with phase("search index"):
+            save_index(index, search_index_path(json_file), json_file)
+
+
+def add_episode(input_file: str, json_file: str = "data.json", use_mmap: bool = False) -> tuple:
+    """
+    Streams a Fountain file into the JSON database.
+    use_mmap switches to the byte-level mmap parser, meant for very large exports.
+    Returns (episode name, added); added is False when the episode was already there.
+    """
+    file_name = episode_name(input_file)
+    names, existing_data = _existing(json_file)
+
+    # Check if file already processed
+    if file_name in names:
+        return file_name, False
+
+    with phase("search index"):
+        index = _fresh_search_index(json_file)
+    _stream_episode(json_file, file_name, _scene_stream(input_file, use_mmap), existing_data, index)
+    return file_name, True
+
+
+def search_data(json_file: str, search_type: str, search_value: str) -> list:
+    """
+    Episodes to run a lookup over. sqlite answers from its own indexes, the file backends
+    from the trigram search index; both return only the scenes that match.
+    Either way the lookup loops still do the final substring test, so results are the same.
+    """
+    if is_sqlite(json_file):
+        with phase("search scan"):
+            return search_sqlite(json_file, search_type, search_value) if os.path.exists(json_file) else []
+    data = load_data(json_file)
+    index = search_index(json_file, data)
+    with phase("search index"):
+        return narrow_data(data, index, search_type, search_value)
+
+
+def ranked_matches(data: list, index, search_type: str, search_value: str, max_distance: int = None,
+                   limit: int = FUZZY_LIMIT) -> list:
+    """
+    A fuzzy lookup: [(value, distance, matches)] for the `limit` distinct artist names or locations
+    closest to search_value (see SearchIndex.fuzzy), closest first, each with the scenes it appears in.
+    """
+    ranked = []
+    for value, distance in index.fuzzy(search_type, search_value, max_distance)[:limit]:
+        episodes = narrow_to_value(data, index, search_type, value)
+        ranked.append((value, distance, find_matches(episodes, search_type, value, exact=True)))
+    return ranked
+
+
+def fuzzy_search_data(json_file: str, search_type: str, search_value: str, max_distance: int = None) -> list:
+    """ranked_matches for a one-off lookup, from the database and its search index."""
+    data = load_data(json_file)
+    return ranked_matches(data, search_index(json_file, data), search_type, search_value, max_distance)
+
+
+def query_matches(data: list, index, conditions: list, check=None) -> tuple:
+    """
+    A compound query (query.py): (matches, plan steps). The index plan picks the candidate
+    scenes, and only those are read and tested against every condition.
+    """
+    with phase("search index"):
+        candidates, steps = plan_query(index, conditions)
+        episodes = narrow_to_candidates(data, candidates)
+    return find_query_matches(episodes, conditions, check), steps
+
+
+def query_data(json_file: str, conditions: list) -> tuple:
+    """
+    query_matches for a one-off query, from the database and its search index. sqlite plans
+    the query itself (sqlite_store.query_sqlite), so it gives no plan steps.
+    """
+    if is_sqlite(json_file):
+        with phase("search scan"):
+            episodes = query_sqlite(json_file, conditions) if os.path.exists(json_file) else []
+        return find_query_matches(episodes, conditions), []
+    data = load_data(json_file)
+    return query_matches(data, search_index(json_file, data), conditions)
+
+
+def lookup_matches(json_file: str, search_type: str, search_value: str):
+    """
+    The matches of a one-off lookup, as an iterator. data.json is streamed and matched as it
+    is read, so the first matches are ready long before the file has been read and only one
+    episode is held at a time; the other backends narrow through their indexes first.
+    """
+    if _is_json(json_file):
+        return timed_iter("search scan", iter_matches(stream_episodes(json_file), search_type, search_value))
+    data = search_data(json_file, search_type, search_value)
+    return iter(find_matches(data, search_type, search_value))
+
+
+class DataCache:
+    """
+    Keeps the loaded database (and its search index) in memory between calls.
+    The file is only read again when its size or mtime changed, and episodes added
+    through the cache are appended to the loaded data instead of re-reading the file.
+    Scenes are held in the compact model (compact_model.py) unless compact=False.
+    """
+
+    def __init__(self, json_file: str, compact: bool = True):
+        self.json_file = json_file
+        self.compact = compact
+        self._data = None
+        self._names = None
+        self._index = None
+        self._signature = None
+
+    def invalidate(self) -> None:
+        self._data = self._names = self._index = self._signature = None
+
+    def data(self) -> list:
+        signature = data_signature(self.json_file)
+        if self._data is None or signature != self._signature:
+            self._data = load_data(self.json_file, self.compact)
+            self._names = set(episode_names(self._data))
+            self._index = None
+            self._signature = signature
+        return self._data
+
+    def index(self):
+        data = self.data()
+        if self._index is None:
+            self._index = search_index(self.json_file, data)
+        return self._index
+
+    def search(self, search_type: str, search_value: str) -> list:
+        """Same episodes search_data would give, answered from memory."""
+        if is_sqlite(self.json_file):
+            return search_data(self.json_file, search_type, search_value)
+        data, index = self.data(), self.index()
+        with phase("search index"):
+            return narrow_data(data, index, search_type, search_value)
+
+    def fuzzy_search(self, search_type: str, search_value: str, max_distance: int = None) -> list:
+        """fuzzy_search_data, answered from memory."""
+        return ranked_matches(self.data(), self.index(), search_type, search_value, max_distance)
+
+    def query(self, conditions: list, check=None) -> tuple:
+        """query_data, answered from memory."""
+        if is_sqlite(self.json_file):
+            return query_data(self.json_file, conditions)
+        return query_matches(self.data(), self.index(), conditions, check)
+
+    def add_episode(self, input_file: str, use_mmap: bool = False, on_scene=None) -> tuple:
+        """
+        add_episode, updating the cached data and index in place. Returns (episode name, added).
+        on_scene(count) is called after every parsed scene; an exception raised from it
+        aborts the add and leaves the database as it was.
+        """
+        data = self.data()
+        file_name = episode_name(input_file)
+        if file_name in self._names:
+            return file_name, False
+
+        scenes = []
+
+        def collecting(stream):
+            for scene in stream:
+                scenes.append(scene)
+                if on_scene is not None:
+                    on_scene(len(scenes))
+                yield scene
+
+        index = self._index if self._index is not None else _fresh_search_index(self.json_file)
+        _stream_episode(self.json_file, file_name, collecting(_scene_stream(input_file, use_mmap)), data, index)
+
+        if isinstance(data, ShardedEpisodes):
+            # The new shard is parsed again only if it is asked for
+            data.reload()
+        else:
+            episode = {"episode": file_name, "scenes": scenes}
+            data.append(compact_episode(episode) if self.compact else episode)
+        self._names.add(file_name)
+        self._index = index
+        self._signature = data_signature(self.json_file)
+        return file_name, True
+
+
+def list_episodes(json_file: str) -> list:
+    """(episode name, scene count) for every episode; a sharded store only reads its manifest."""
+    if is_sharded(json_file):
+        return [(record["episode"], record["scenes"]) for record in read_manifest(json_file)]
+    return [(entry["episode"], len(entry["scenes"])) for entry in load_data(json_file)]
+
+
+def migrate_data(source: str, target: str) -> int:
+    """Copies the whole database between backends (picked by extension). Returns the episode count."""
+    # A sharded source is read through whole; json.dump needs a real list
+    data = list(load_data(source))
+    save_data(target, data)
+    return len(data)
+
+
+def parse_files(input_files: list, workers: int = None, use_mmap: bool = False) -> list:
+    """
+    Parses Fountain files in parallel worker processes (inline for a single file or workers=1).
+    Returns (input_file, episode, error) for every file, in input order; exactly one of
+    episode/error is None, so one bad file never stops the others.
+    """
+    parse = partial(parse_fountain_file, use_mmap=use_mmap)
+    results = []
+    if len(input_files) <= 1 or workers == 1:
+        for input_file in input_files:
+            try:
+                results.append((input_file, parse(input_file), None))
+            except Exception as e:
+                results.append((input_file, None, f"{type(e).__name__}: {e}"))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(input_file, pool.submit(parse, input_file)) for input_file in input_files]
+            for input_file, future in futures:
+                try:
+                    results.append((input_file, future.result(), None))
+                except Exception as e:
+                    results.append((input_file, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def add_episodes(input_files: list, json_file: str = "data.json", workers: int = None, use_mmap: bool = False) -> dict:
+    """
+    Adds many Fountain files in one go: files are parsed in parallel worker processes,
+    then the duplicate check and the write to the JSON file happen once for the whole batch.
+    A file that fails to parse is reported and the rest of the batch still goes in.
+    Returns {"added": [names], "skipped": [names], "errors": [(path, message)]}.
+    """
+    names, existing_data = _existing(json_file)
+    seen = set(names)
+    report = {"added": [], "skipped": [], "errors": []}
+
+    # Duplicate check up front, so already-known episodes are never parsed
+    to_parse = []
+    for input_file in input_files:
+        name = episode_name(input_file)
+        if name in seen:
+            report["skipped"].append(name)
+            continue
+        seen.add(name)
+        to_parse.append(input_file)
+
+    new_episodes = []
+    for input_file, episode, error in parse_files(to_parse, workers, use_mmap):
+        if error:
+            report["errors"].append((input_file, error))
+        else:
+            new_episodes.append(episode)
+
+    if new_episodes:
+        store_episodes(json_file, new_episodes, existing_data)
+        report["added"] = [episode["episode"] for episode in new_episodes]
+    return report
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sync_directory(script_dir: str, json_file: str = "data.json", workers: int = None, use_mmap: bool = False) -> dict:
+    """
+    Brings the database in line with a directory of .fountain files.
+    A state file next to the database records each file's size, mtime and sha256;
+    files whose size and mtime are unchanged aren't even opened, files whose content hash
+    changed are reparsed and their episode is replaced in place, new files are appended.
+    Files that disappeared are reported but their episodes are kept.
+    The state also records the database's path and signature; if the database changed since
+    (deleted, replaced, or written by something else), a file only counts as unchanged while
+    its episode is still in the database, so a lost database is rebuilt on the next sync.
+    Returns {"added": [...], "updated": [...], "unchanged": n, "removed": [...], "errors": [...]}.
+    """
+    state_file = sidecar_path(json_file, ".sync.json")
+    raw = {}
+    if os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    # State files from before the database was recorded are a bare {path: record}
+    state = raw.get("files", {}) if "files" in raw else raw
+    database = [os.path.abspath(json_file), data_signature(json_file)]
+
+    names, existing_data = None, None
+    if raw.get("database") != database:
+        names, existing_data = _existing(json_file)
+        names = set(names)
+
+    report = {"added": [], "updated": [], "unchanged": 0, "removed": [], "errors": []}
+    new_state = {}
+    changed = []
+    seen_paths = set()
+
+    for entry in sorted(os.scandir(script_dir), key=lambda e: e.name):
+        if not entry.is_file() or not entry.name.endswith(".fountain"):
+            continue
+        path = os.path.abspath(entry.path)
+        seen_paths.add(path)
+        stat = entry.stat()
+        known = state.get(path)
+        if known and names is not None and known["episode"] not in names:
+            # Its episode is no longer in the database
+            known = None
+
+        # Size and mtime unchanged: trust the recorded hash
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            new_state[path] = known
+            report["unchanged"] += 1
+            continue
+
+        digest = file_hash(path)
+        record = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest, "episode": episode_name(path)}
+        if known and known["hash"] == digest:
+            # Touched but not edited
+            new_state[path] = record
+            report["unchanged"] += 1
+            continue
+        changed.append((path, record))
+
+    report["removed"] = [path for path in state if path not in seen_paths]
+
+    if changed:
+        if names is None:
+            names, existing_data = _existing(json_file)
+        known_names = set(names)
+        records = dict(changed)
+        parsed = []
+
+        for path, episode, error in parse_files([path for path, _ in changed], workers, use_mmap):
+            if error:
+                report["errors"].append((path, error))
+                continue
+            name = episode["episode"]
+            if name in known_names:
+                report["updated"].append(name)
+            else:
+                known_names.add(name)
+                report["added"].append(name)
+            parsed.append(episode)
+            new_state[path] = records[path]
+
+        if parsed:
+            store_episodes(json_file, parsed, existing_data)
+
+    # Keep the state of files that failed, so they are retried next time
+    for path, _ in changed:
+        if path not in new_state and path in state:
+            new_state[path] = state[path]
+
+    new_raw = {"database": [os.path.abspath(json_file), data_signature(json_file)], "files": new_state}
+    if new_raw != raw:
+        with atomic_write(state_file, encoding="utf-8") as f:
+            json.dump(new_raw, f, ensure_ascii=False, indent=4)
+
+    return report
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from atomic_file import atomic_write
+
+
+def test_failed_write_leaves_the_file_and_no_temp(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("old", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path), encoding="utf-8") as f:
+            f.write("new")
+            raise RuntimeError
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_overlapping_writers_get_their_own_temp_files(tmp_path):
+    path = str(tmp_path / "data.json")
+    with atomic_write(path, encoding="utf-8") as first:
+        with atomic_write(path, encoding="utf-8") as second:
+            assert len(os.listdir(tmp_path)) == 2
+            second.write("second")
+        first.write("first")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "first"
+    assert os.listdir(tmp_path) == ["data.json"]
@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy_search import FuzzyIndex, edit_distance
+
+ALPHABET = "abcdeilmnorst"
+
+
+def _levenshtein(a, b):
+    # Plain dynamic-programming reference
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def _terms(rng, count):
+    return {"".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 9))) for _ in range(count)}
+
+
+def _edited(rng, term, edits):
+    # term with `edits` random deletions, substitutions or insertions (possibly from outside the alphabet)
+    for _ in range(edits):
+        pos = rng.randint(0, len(term))
+        kind = rng.choice("dsi") if term else "i"
+        char = rng.choice(ALPHABET + "xz")
+        if kind == "d" and pos < len(term):
+            term = term[:pos] + term[pos + 1:]
+        elif kind == "s" and pos < len(term):
+            term = term[:pos] + char + term[pos + 1:]
+        else:
+            term = term[:pos] + char + term[pos:]
+    return term
+
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(1)
+    words = sorted(_terms(rng, 150)) + ["", "rahim", "rahím", "ঢাকা"]
+    for a in words:
+        for b in rng.sample(words, 20) + ["", a]:
+            assert edit_distance(a, b) == _levenshtein(a, b), (a, b)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    terms = sorted(_terms(rng, 400))
+    index = FuzzyIndex()
+    for term in terms:
+        index.add(term)
+    index.add(terms[0])  # Adding a term twice changes nothing
+
+    queries = [_edited(rng, rng.choice(terms), rng.randint(0, 3)) for _ in range(150)]
+    for query in queries:
+        distances = {term: edit_distance(query, term) for term in terms}
+        for max_distance in (0, 1, 2):
+            expected = {(term, distance) for term, distance in distances.items() if distance <= max_distance}
+            found = index.search(query, max_distance)
+            assert len(found) == len(set(found))
+            assert set(found) == expected, (query, max_distance)
@@ -0,0 +1,68 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_json_array
+
+VALID = [
+    "[]",
+    " [ ] ",
+    "\n\t [\n]\n\n",
+    "[1]",
+    "[1, 22, 333]",
+    "[-0, -1.5e10, 2E-3, 0.25, 10]",
+    "[12345678901234567890]",
+    "[1,2]  \r\n",
+    '["a", "b\\"]", "[", "\\u00e9\\n", "ঢাকা"]',
+    "[true, false, null]",
+    '[{"episode": "ep1", "scenes": [{"artists": [], "TOD": "Night"}]}, {"episode": "ep2", "scenes": []}]',
+    '[ {"a": [1, [2, [3]]]} , [] , {} ]',
+    json.dumps([{"episode": f"ep{idx}", "scenes": [{"n": idx * 7.5}] * 3} for idx in range(5)], indent=4),
+]
+
+BROKEN = [
+    "",
+    "   ",
+    "{}",
+    "5",
+    "[",
+    "[1,",
+    "[1 2]",
+    "[1,]",
+    "[1] 2",
+    "[1]]",
+    "[] []",
+    "[1] x",
+    '["abc',
+    "[12",
+    "[-]",
+    "[1.]",
+    '[{"a": 1}',
+    '[{"a": 1]',
+]
+
+CHUNK_SIZES = [1, 2, 3, 4, 5, 7, 8, 13, 64, 1 << 20]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", VALID)
+def test_valid_arrays_match_json_loads(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", BROKEN)
+def test_broken_arrays_raise(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+def test_object_hook_and_path(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('[{"a": 1}, {"b": 2}]', encoding="utf-8")
+    assert list(iter_json_array(str(path), chunk_size=3, object_hook=lambda obj: sorted(obj))) == [["a"], ["b"]]
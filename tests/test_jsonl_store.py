@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonl_store import append_jsonl, append_jsonl_stream, jsonl_episode_names, load_jsonl
+
+
+def _episode(name):
+    return {"episode": name, "scenes": [{"scene_number": "1", "location": "Kitchen", "artists": []}]}
+
+
+def _tear_last_line(path):
+    # What a process killed in the middle of an append leaves behind
+    os.truncate(path, os.path.getsize(path) - 10)
+
+
+def test_append_after_a_torn_line_keeps_every_episode(tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    append_jsonl(path, [_episode("ep1")])
+    append_jsonl(path, [_episode("ep2")])
+    _tear_last_line(path)
+    assert jsonl_episode_names(path) == ["ep1"]
+
+    append_jsonl(path, [_episode("ep2")])
+    append_jsonl_stream(path, "ep4", iter(_episode("ep4")["scenes"]))
+    assert jsonl_episode_names(path) == ["ep1", "ep2", "ep4"]
+    assert [episode["episode"] for episode in load_jsonl(path)] == ["ep1", "ep2", "ep4"]
+
+
+def test_unterminated_whole_record_is_kept(tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    append_jsonl(path, [_episode("ep1")])
+    os.truncate(path, os.path.getsize(path) - 1)
+    assert jsonl_episode_names(path) == ["ep1"]
+
+    append_jsonl(path, [_episode("ep2")])
+    assert [episode["episode"] for episode in load_jsonl(path)] == ["ep1", "ep2"]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query import find_query_matches, parse_query
+from search_results import iter_matches
+
+
+def _artist(name, costume="", props=""):
+    return {"artist": name, "costume": costume, "props": props}
+
+
+DATA = [{
+    "episode": "Episode 1",
+    "scenes": [{
+        "scene_number": "1",
+        "location": "Kitchen",
+        "setting": "INT",
+        "TOD": "Night",
+        "artists": [_artist("Rahim Khan"), _artist("Karim"), _artist("Rahim Islam", props="knife")],
+    }],
+}]
+
+
+def test_two_matching_artists_split_like_an_artist_lookup():
+    [match] = find_query_matches(DATA, parse_query("artist:rahim tod:night"))
+    [lookup] = iter_matches(DATA, "artist", "rahim")
+    assert match.artist is lookup.artist
+    assert match.artist["artist"] == "Rahim Islam"
+    assert [artist["artist"] for artist in match.others] == [artist["artist"] for artist in lookup.others] == ["Karim"]
+
+
+def test_no_artist_condition_lists_every_artist():
+    [match] = find_query_matches(DATA, parse_query("location:kitchen props:knife"))
+    assert match.artist is None
+    assert len(match.others) == 3
@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import FIELDS, SearchIndex, scene_values
+
+NAMES = ["Rahim Khan", "Karim", "Rahima Islam", "Nusrat", "Tariq Anam", "Ali", "Mir Sabbir", "Chanchal Chowdhury"]
+LOCATIONS = ["Kitchen", "Rooftop", "Office Lobby", "Rahim's House", "Tea Stall", "Bus Stop", "Kitchen Garden"]
+
+
+def _scene(rng):
+    return {
+        "location": rng.choice(LOCATIONS),
+        "setting": rng.choice(["INT", "EXT"]),
+        "TOD": rng.choice(["Day", "Night", "Evening"]),
+        "artists": [{"artist": name, "costume": rng.choice(["Saree", "Lungi", "Suit", ""]),
+                     "props": rng.choice(["Knife", "Tea Cup", "", "Umbrella"])}
+                    for name in rng.sample(NAMES, rng.randint(0, 4))],
+    }
+
+
+def _data(rng, episodes=30):
+    return [{"episode": f"ep{idx}", "scenes": [_scene(rng) for _ in range(rng.randint(0, 8))]} for idx in range(episodes)]
+
+
+def _scan(data, field, search_value):
+    found = {}
+    for ep_idx, entry in enumerate(data):
+        for scene_idx, scene in enumerate(entry["scenes"]):
+            if any(search_value in value for value in scene_values(field, scene)):
+                found.setdefault(ep_idx, set()).add(scene_idx)
+    return found
+
+
+def _queries(rng):
+    texts = NAMES + LOCATIONS + ["Saree", "Tea Cup", "Umbrella", "Night", "INT"]
+    queries = ["", "a", "zz", "rahim", "kitchen", "'s h", "tea c", "chowdhuryx"]
+    for _ in range(60):
+        text = rng.choice(texts).lower()
+        start = rng.randint(0, len(text) - 1)
+        queries.append(text[start:start + rng.randint(1, 6)])
+    return queries
+
+
+def test_candidates_match_a_full_scan():
+    rng = random.Random(7)
+    data = _data(rng)
+    index = SearchIndex.build(data)
+    for query in _queries(rng):
+        for field in FIELDS:
+            assert index.candidates(field, query) == _scan(data, field, query), (field, query)
+
+
+def test_candidates_after_replacing_episodes():
+    rng = random.Random(8)
+    data = _data(rng)
+    index = SearchIndex.build(data)
+    queries = _queries(rng)
+    # Build the trigram maps first, so replacing episodes has to keep them up to date
+    for field in FIELDS:
+        index.candidates(field, "rahim")
+    for ep_idx in rng.sample(range(len(data)), 10):
+        data[ep_idx] = {"episode": data[ep_idx]["episode"], "scenes": [_scene(rng) for _ in range(rng.randint(0, 8))]}
+        index.set_episode(data[ep_idx]["episode"], data[ep_idx]["scenes"])
+    data.append({"episode": "new", "scenes": [_scene(rng) for _ in range(5)]})
+    index.set_episode("new", data[-1]["scenes"])
+
+    for query in queries:
+        for field in FIELDS:
+            assert index.candidates(field, query) == _scan(data, field, query), (field, query)
+
+
+def test_json_round_trip_keeps_candidates():
+    rng = random.Random(9)
+    data = _data(rng)
+    index = SearchIndex.from_json(SearchIndex.build(data).to_json())
+    for query in _queries(rng):
+        for field in FIELDS:
+            assert index.candidates(field, query) == _scan(data, field, query), (field, query)
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shard_store import LOCK, LOCK_STALE, SHARD_DIR, append_sharded_stream, sharded_episode_names, write_sharded_episodes
+
+
+def _episode(name):
+    return {"episode": name, "scenes": [{"scene_number": "1", "location": "Kitchen", "artists": []}]}
+
+
+def test_overlapping_writers_keep_every_episode(tmp_path):
+    path = str(tmp_path / "data.shards")
+
+    def add(writer):
+        for idx in range(10):
+            episode = _episode(f"ep{writer}-{idx}")
+            if idx % 2:
+                write_sharded_episodes(path, [episode])
+            else:
+                append_sharded_stream(path, episode["episode"], iter(episode["scenes"]))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(add, range(8)))
+    assert len(sharded_episode_names(path)) == 80
+    assert len(os.listdir(os.path.join(path, SHARD_DIR))) == 80
+    assert not os.path.exists(os.path.join(path, LOCK))
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    path = str(tmp_path / "data.shards")
+    os.makedirs(path)
+    lock_file = os.path.join(path, LOCK)
+    open(lock_file, "w").close()
+    old = time.time() - LOCK_STALE - 1
+    os.utime(lock_file, (old, old))
+
+    write_sharded_episodes(path, [_episode("ep1")])
+    assert sharded_episode_names(path) == ["ep1"]
+    assert not os.path.exists(lock_file)
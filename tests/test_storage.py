@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import sidecar_path
+
+
+def test_sidecar_path_ignores_a_trailing_slash():
+    assert sidecar_path("data.json", ".sync.json") == "data.sync.json"
+    assert sidecar_path("data.shards", ".sync.json") == "data-shards.sync.json"
+    assert sidecar_path("data.shards/", ".sync.json") == "data-shards.sync.json"
+    assert sidecar_path(os.path.join("store", "data.shards") + os.sep, ".search_index.json") == \
+        os.path.join("store", "data-shards.search_index.json")